@@ -10,7 +10,13 @@
 #
 #================================================================
 
-from .utils import split_sentence
+import traceback
+from copy import deepcopy
+from collections import OrderedDict, namedtuple
+
+from .utils import iter_sentences
+from .utils.cache import LRUCache, version_stamp
+from .utils.disk_cache import DiskCache
 
 from .src.extractor import Extractor
 from .src.sent_score import SentScore
@@ -20,11 +26,24 @@ from .src.pattern_parser import PatternParser
 from .src.pattern_matcher import PatternMatcher
 from .src.postprocess import PostProcessor
 from .src.coref_parser import CorefParser
+from .src.coref_resolver import HeuristicCorefResolver
 from .src.sentence_pattern import HypoSentence
 from .src.sentence_pattern import InteSentence
+from .src.prefilter import LexiconPrefilter
 
 from .utils.logger import logger
 
+# 子句缓存项: 子句 token 数, 以子句内相对偏移生成的后处理前抽取结果
+ClauseEntry = namedtuple("ClauseEntry", ["n_tokens", "results"])
+# 结构缓存项: 短语分组(含默认匹配组), 情感打分前的抽取结果(只复用 token id)
+StructureEntry = namedtuple("StructureEntry", ["groups", "results"])
+# 锚点设置结果: 联合情感词锚点打分、是否存在联合情感词锚点、联合情感词 token 集合
+Anchors = namedtuple("Anchors", ["joint_anchor_sent", "joint_anchor_flag", "joint_tuples"])
+CACHE_VERSION_FILES = ['./data/rule/rule.en', './data/*.txt']
+CACHE_VERSION_MODELS= ['./data/model/**/*']
+# 缓存项结构版本, ClauseEntry 字段变更后递增, 使持久化缓存中的旧格式数据不再命中
+CACHE_FORMAT = 2
+
 
 class Executor(object):
     def __new__(cls, *args, **kwargs):
@@ -39,11 +58,149 @@ class Executor(object):
         self.pattern_matcher = PatternMatcher(pattern_map=self.pattern_object.pattern_map,
                                               vocab = self.token_parser.model.vocab)
         self.extractor = Extractor(self.pattern_object)
-        self.sent_score= SentScore(self.token_parser.nlp, anchor_type_sent=anchor_type_sent)
+        self.sent_score= SentScore(self.token_parser.nlp, anchor_type_sent=anchor_type_sent, \
+                                   variant=config.get('sentiment_model_variant', 'auto'), \
+                                   intra_op_threads=config.get('sentiment_intra_op_threads', 0), \
+                                   inter_op_threads=config.get('sentiment_inter_op_threads', 0), \
+                                   io_binding=config.get('sentiment_io_binding', True), \
+                                   polarity=config.get('sentiment_polarity', 'textblob'))
         self.postprocessor= PostProcessor()
-        self.coref_parser = CorefParser(config['neuralcoref_hosts'], timeout=3)
-        self.hypo_detector = HypoSentence()
-        self.inte_detector = InteSentence(config['sentence_pattern'])
+        self.coref_parser = CorefParser(config['neuralcoref_hosts'], timeout=3, \
+                                        **config.get('coref_options', {}))
+        self.coref_resolver = HeuristicCorefResolver()
+        # 句型判断结果缓存, 按子句文本及模型版本复用虚拟语句/疑问语句判断结果; 各缓存默认关闭,
+        # 通过 config 中的 *_cache_size 开启
+        verdict_cache_size = config.get('verdict_cache_size', 0)
+        self.hypo_detector = HypoSentence(cache_size=verdict_cache_size)
+        self.inte_detector = InteSentence(config['sentence_pattern'], cache_size=verdict_cache_size)
+        # 解析方式: clause(逐子句解析) | document(整篇解析, 分句结果作为句子边界)
+        self.parse_mode = config.get('parse_mode', 'clause')
+        self._batch_mode_warned = False
+        # 子句缓存: 内存 LRU 为一级缓存, 可选的持久化缓存(sqlite)为二级缓存
+        cache_size = config.get('clause_cache_size', 0)
+        self.clause_cache = LRUCache(cache_size) if cache_size>0 else None
+        self.cache_version = self._cache_version()
+        # 结构缓存: 解析后按子句结构签名复用匹配及抽取结果
+        structure_cache_size = config.get('structure_cache_size', 0)
+        self.structure_cache = LRUCache(structure_cache_size) if structure_cache_size>0 else None
+        self.disk_cache = None
+        if config.get('disk_cache'):
+            if self.clause_cache is None:
+                logger.warning("[CACHE]: disk cache requires clause cache, disk cache disabled!!!")
+            else:
+                self.disk_cache = DiskCache(config['disk_cache'], self.cache_version)
+        # 词典预过滤: off | on(跳过不可能出现锚点的子句) | verify(不跳过, 检查预过滤是否会改变结果)
+        prefilter_mode = config.get('prefilter', 'off')
+        self.prefilter = self._build_prefilter(prefilter_mode) if prefilter_mode!='off' else None
+
+    def _build_prefilter(self, mode):
+        return LexiconPrefilter(self.token_parser.nlp, self.token_parser.dataset, \
+                                self.pattern_object.pattern_map, mode=mode)
+
+    def _cache_version(self):
+        meta = self.token_parser.nlp.meta
+        spacy_model = f"{meta.get('lang')}_{meta.get('name')}-{meta.get('version')}"
+        return version_stamp(CACHE_VERSION_FILES, stat_patterns=CACHE_VERSION_MODELS, \
+                             extra=[CACHE_FORMAT, spacy_model, self.sent_score.variant, self.sent_score.polarity])
+
+    def reset_cache(self):
+        r''' 规则或词典重新加载后调用, 更新版本戳并清空子句缓存
+        '''
+        self.cache_version = self._cache_version()
+        if self.clause_cache is not None:
+            self.clause_cache.clear()
+        if self.structure_cache is not None:
+            self.structure_cache.clear()
+        if self.disk_cache is not None:
+            self.disk_cache.set_version(self.cache_version)
+        if self.prefilter is not None:
+            self.prefilter = self._build_prefilter(self.prefilter.mode)
+
+    def cache_stats(self):
+        stats = dict()
+        if self.clause_cache is not None:
+            stats["memory"] = self.clause_cache.stats
+        if self.structure_cache is not None:
+            stats["structure"] = self.structure_cache.stats
+        if self.disk_cache is not None:
+            stats["disk"] = self.disk_cache.stats
+        if self.hypo_detector.cache is not None:
+            stats["hypothetical"] = self.hypo_detector.cache.stats
+        if self.inte_detector.cache is not None:
+            stats["interrogative"] = self.inte_detector.cache.stats
+        return stats
+
+    def _cache_lookup(self, splits):
+        r''' 查询子句缓存; 内存未命中的子句统一查询一次持久化缓存, 命中结果写回内存缓存
+        Args:
+            splits: {doc_index: [(char_start, clause_text), ...]}
+        Returns:
+            {doc_index: [ClauseEntry|None, ...]}, 与 splits 中子句一一对应
+        '''
+        cached = dict()
+        for i, clauses in splits.items():
+            cached[i] = [self.clause_cache.get((self.cache_version, _text)) if _text else None \
+                            for _, _text in clauses]
+        if self.disk_cache is None:
+            return cached
+
+        misses = [_text for i, clauses in splits.items() \
+                    for (_, _text), entry in zip(clauses, cached[i]) if _text and entry is None]
+        if not misses:
+            return cached
+        disk_cached = self.disk_cache.get_many(misses)
+        for i, clauses in splits.items():
+            for inx, (_, _text) in enumerate(clauses):
+                if cached[i][inx] is None and _text in disk_cached:
+                    cached[i][inx] = disk_cached[_text]
+                    self.clause_cache.put((self.cache_version, _text), cached[i][inx])
+
+        return cached
+
+    def _cache_put(self, _text, entry):
+        if self.clause_cache is None:
+            return
+        self.clause_cache.put((self.cache_version, _text), entry)
+        if self.disk_cache is not None:
+            self.disk_cache.put(_text, entry)
+
+    def _cache_flush(self):
+        if self.disk_cache is not None:
+            self.disk_cache.flush()
+
+    def _prefilter_skip(self, splits, cached):
+        r''' 词典预过滤: 不可能出现锚点的子句直接生成空结果项(只分词计算 token 数),
+        跳过句型判断、解析及抽取; 空结果项不写入缓存
+        Args:
+            splits: {doc_index: [(char_start, clause_text), ...]}
+            cached: {doc_index: [ClauseEntry|None, ...]}, 原地更新
+        '''
+        for i, clauses in splits.items():
+            for inx, (_, _text) in enumerate(clauses):
+                if not _text or cached[i][inx] is not None or self.prefilter(_text):
+                    continue
+                logger.info(f"[FILTER]: filted by PREFILTER: {_text}")
+                n_tokens = len(self.token_parser.nlp.make_doc(_text))
+                cached[i][inx] = ClauseEntry(n_tokens, [])
+
+    def _prefilter_verify(self, _text, results):
+        if self.prefilter is not None and self.prefilter.mode == "verify":
+            self.prefilter.verify(_text, results)
+
+    def prefilter_stats(self):
+        return self.prefilter.stats if self.prefilter is not None else {}
+
+    def _structure_signature(self, doc):
+        r''' 子句结构签名: 锚点设置完成后, 影响短语分组、模式匹配及抽取结果的所有 token 属性
+        (lemma, 词性, 依存关系, head 相对位置, 锚点, 标点/数字/句首/空格, 程度副词及 pattern 字面值)
+        '''
+        degree_dict = self.token_parser.dataset.degree_intensity_dict
+        orth_values = self.pattern_matcher.orth_values
+        lower_values= self.pattern_matcher.lower_values
+        return tuple((t.lemma_, t.pos_, t.dep_, t.head.i-t.i, t._.anchor, t.is_punct, t.like_num,
+                      t.is_sent_start, bool(t.whitespace_),
+                      t.text if (t.text in degree_dict or t.text in orth_values) else '',
+                      t.lower_ if t.lower_ in lower_values else '') for t in doc)
 
     def _register(self):
         @self.token_parser.register("anchor")
@@ -68,101 +225,597 @@ class Executor(object):
                     flag = True
             return flag
 
-    def extract(self, text, coref=False):
-        corefmap = self.coref_parser(text) if coref else {}
-        logger.debug(f"coref map: {corefmap}")
-        _texts = split_sentence(text)
+    def _split(self, text):
+        r''' 分句, 并去除子句前缀空格
+        Returns:
+            _texts: 分句结果
+            clauses: [(char_start, clause_text), ...], 与 _texts 一一对应,
+                     char_start 为去除前缀空格后的子句在文档中的起始位置
+        '''
+        _texts, clauses = [], []
+        for start, _, _text in iter_sentences(text):
+            clause_text = _text.lstrip(' ')
+            _texts.append(_text)
+            clauses.append((start+len(_text)-len(clause_text), clause_text))
 
-        # 句型判断
-        hypots =  self.hypo_detector(_texts)
+        return _texts, clauses
 
-        results = []
-        token_offset, char_offset = 0, 0
-        for inx, _text in enumerate(_texts):
-            prefix_offset = 0
-            for char in _text:
-                if char!=' ':
-                    break
-                prefix_offset += 1
+    def _anchor_clause(self, doc):
+        r''' 锚点设置(否定锚点、联合情感词锚点及 badcase 处理)
+        Returns:
+            Anchors, 子句不存在锚点时返回 None
+        '''
+        logger.debug(f"anchor tokens: {[t.text for t in doc if t._.anchor]}")
+        self.token_parser.update_extension(doc)
+        doc_lemma, joint_anchor_sent, joint_anchor_flag, joint_tuples = \
+            self.token_parser.joint_sentiment_anchor_setter(doc)
+        self.token_parser.anchor_badcase_postprocess(doc, doc_lemma)
+        anchor_tokens = [t.text for t in doc if t._.anchor] 
+        logger.debug(f"processed anchor tokens: {anchor_tokens}")
+        if not anchor_tokens:
+            logger.info(f"NO anchor tokens!!!")
+            return None
 
-            if prefix_offset>0:
-                char_offset  += prefix_offset
+        return Anchors(joint_anchor_sent, joint_anchor_flag, joint_tuples)
 
-            _text = _text[prefix_offset:]
+    def _gate(self, docs_map, texts_map, parse_mode="clause"):
+        r''' 由低到高成本的过滤链: 锚点 -> 疑问语句(xgboost) -> 虚拟语句(transformer);
+        每一级只处理前一级保留的子句, 句型判断跨文档批量执行
+        Args:
+            docs_map: {doc_index: [Doc|None, ...]}, None 表示空子句或无需处理的子句
+            texts_map: {doc_index: [clause_text, ...]}, 与 docs_map 中子句一一对应
+            parse_mode: docs 的解析模式, [ clause | document ]
+        Returns:
+            anchors: {doc_index: [Anchors|None, ...]}, None 表示子句被过滤(无锚点、疑问语句或虚拟语句)
+            failed: {doc_index: Exception}
+        '''
+        anchors, failed = OrderedDict(), dict()
+        for i, docs in docs_map.items():
+            try:
+                anchors[i] = [self._anchor_clause(doc) if doc is not None else None for doc in docs]
+            except Exception as e:
+                logger.error(f"[BATCH]: doc [{i}] anchor setting failed: {traceback.format_exc()}")
+                failed[i] = e
 
-            if not _text:
+        inte_docs = OrderedDict((i, [doc if anchor is not None else None \
+                                        for doc, anchor in zip(docs_map[i], _anchors)]) \
+                                    for i, _anchors in anchors.items())
+        inters = self._inte_batch(inte_docs, parse_mode=parse_mode)
+
+        hypo_texts = OrderedDict()
+        for i, docs in inte_docs.items():
+            if isinstance(inters[i], Exception):
+                failed[i] = inters.pop(i)
                 continue
-            
-            logger.info(f"parse clause: {_text} ")
-            doc = self.token_parser(_text)
+            hypo_texts[i] = [_text for _text, doc, inter in zip(texts_map[i], docs, inters[i]) \
+                                if doc is not None and not inter]
+        _hypots = self._hypo_batch(hypo_texts)
 
-            if hypots[inx]:
-                token_offset += len(doc)
-                if len(doc)>0:
-                    char_offset += doc[-1].idx+len(doc[-1].text)     # 避免末尾是空格情况
-                logger.info(f"[FILTER]: filted by HYPOTHETICAL !!!")
+        for i, _hypot in _hypots.items():
+            if isinstance(_hypot, Exception):
+                failed[i] = _hypot
                 continue
-            if self.inte_detector([doc])[0]:
-                token_offset += len(doc)
-                if len(doc)>0:
-                    char_offset += doc[-1].idx+len(doc[-1].text)     # 避免末尾是空格情况
-                logger.info(f"[FILTER]: filted by INTERROGATIVE !!!")
+            _hypot = iter(_hypot)
+            hypots = [next(_hypot) if (doc is not None and not inter) else False \
+                        for doc, inter in zip(inte_docs[i], inters[i])]
+            for j, (_text, hypot, inter) in enumerate(zip(texts_map[i], hypots, inters[i])):
+                if inter:
+                    logger.info(f"[FILTER]: filted by INTERROGATIVE: {_text}")
+                elif hypot:
+                    logger.info(f"[FILTER]: filted by HYPOTHETICAL: {_text}")
+                else:
+                    continue
+                anchors[i][j] = None
+
+        return anchors, failed
+
+    def _extract_clause(self, doc, anchors, token_offset, char_offset, jobs=None):
+        r''' 单个子句的匹配及抽取
+        Args:
+            anchors: 过滤链返回的锚点设置结果, None 表示子句已被过滤
+            jobs: 情感打分任务列表, 不为 None 时只追加打分任务, 由调用方统一批量打分
+        '''
+        if anchors is None:
+            return []
+        joint_anchor_sent, joint_anchor_flag, joint_tuples = anchors
+
+        # 结构相同的子句复用短语分组、匹配及抽取结果, 只重新生成文本、偏移及情感打分
+        signature, entry = None, None
+        if self.structure_cache is not None:
+            signature = (self.cache_version, self._structure_signature(doc))
+            entry = self.structure_cache.get(signature)
+        if entry is not None:
+            logger.info(f"[CACHE]: structure hit clause: {doc.text}")
+            groups = entry.groups
+            _results = self.extractor.refill(doc, entry.results, \
+                                             token_offset=token_offset, char_offset=char_offset)
+            self._sent_score(doc, groups, _results, joint_anchor_sent, jobs)
+            return _results
+
+        groups = self.phrase_parser(doc)
+
+        logger.debug(f"phrase_groups: {groups.phrase_groups}")
+        logger.debug(f"neg_groups: {groups.neg_group}")
+        logger.debug(f"cc_groups: {groups.cc_groups}")
+        logger.debug(f"poss_groups: {groups.poss_group}")
+        logger.debug(f"prt_groups: {groups.prt_group}")
+        logger.debug(f"xcomp_groups: {groups.xcomp_group}")
+        logger.debug(f"aux_groups: {groups.aux_group}")
+        logger.debug(f"joint_anchor_sent: {joint_anchor_sent}")
+
+        matches, groups.default_match_group = self.pattern_matcher(doc)
+        logger.info(f"pattern matches: {matches}")
+        logger.debug(f"default match group: {groups.default_match_group}")
+        _results = self.extractor(doc, matches, joint_anchor_flag, joint_tuples, \
+                groups=groups, token_offset=token_offset, char_offset=char_offset)
+        if signature is not None:
+            # 情感打分会修改结果, 缓存打分前的副本
+            self.structure_cache.put(signature, StructureEntry(groups, deepcopy(_results)))
+        self._sent_score(doc, groups, _results, joint_anchor_sent, jobs)
+
+        return _results
+
+    def _sent_score(self, doc, groups, _results, joint_anchor_sent, jobs=None):
+        if jobs is None:
+            self.sent_score(doc, groups, _results, joint_anchor_sent, anchor_type=doc._.anchor_type)
+        else:
+            jobs.append((doc, groups, _results, joint_anchor_sent, doc._.anchor_type))
+
+    def _parse_document(self, text, clauses):
+        r''' 整篇解析模式: 一次解析全文, 子句以 Span 切分后转为子 Doc, 偏移由 token 位置直接给出
+        Returns:
+            docs: 与 clauses 一一对应的子句 Doc, 空子句对应 None
+            offsets: 与 clauses 一一对应的 (token_offset, char_offset)
+            子句边界无法与 token 对齐时返回 None
+        '''
+        starts = [char_start if _text else None for char_start, _text in clauses]
+        doc = self.token_parser.parse_document(text, [start for start in starts if start is not None])
+        token_starts = {token.idx:token.i for token in doc}
+        if any(start is not None and start not in token_starts for start in starts):
+            return None
+
+        # 子句范围: 当前子句起始 token 至下一子句起始 token, 首个子句之前的空白不计入子句
+        bounds = [token_starts[start] for start in starts if start is not None] + [len(doc)]
+        docs, offsets = [], []
+        inx = 0
+        for start in starts:
+            if start is None:
+                docs.append(None)
+                offsets.append(None)
+                continue
+            span = doc[bounds[inx]:bounds[inx+1]]
+            docs.append(span.as_doc(copy_user_data=True))
+            offsets.append((span.start, span.start_char))
+            inx += 1
+
+        return docs, offsets
+
+    def _extract_clauses(self, clauses, docs, anchors, cached=None, offsets=None):
+        r''' 依次处理文档的所有子句, 所有子句抽取完成后统一批量情感打分
+        Args:
+            clauses: [(char_start, clause_text), ...]
+            docs: 与 clauses 一一对应的解析结果, 空子句及命中缓存子句对应 None
+            anchors: 与 clauses 一一对应的过滤链结果, None 表示子句已被过滤
+            cached: 与 clauses 一一对应的缓存查询及预过滤结果, None 表示全部未命中
+            offsets: 整篇解析模式下与 clauses 一一对应的 (token_offset, char_offset)
+        '''
+        jobs = []
+        extracted = self._extract_pending(clauses, docs, anchors, jobs, cached, offsets)
+        self.sent_score.batch(jobs)
+
+        return self._assemble(clauses, docs, extracted, cached, offsets)
+
+    def _extract_pending(self, clauses, docs, anchors, jobs, cached=None, offsets=None):
+        r''' 匹配及抽取未命中缓存的子句, 情感打分任务追加到 jobs, 打分完成后由 _assemble 合并结果;
+        使用子句缓存时以相对偏移抽取, 合并时再平移到文档偏移
+        Returns:
+            与 clauses 一一对应的抽取结果, 未抽取的子句对应 None
+        '''
+        extracted = [None] * len(clauses)
+        cached = cached or [None]*len(clauses)
+        token_offset = 0
+        for inx, (char_offset, _text) in enumerate(clauses):
+            # 预过滤跳过的子句对应 None
+            if not _text or (offsets is not None and docs[inx] is None):
+                continue
+            if offsets is not None:
+                logger.info(f"parse clause: {_text} ")
+                extracted[inx] = self._extract_clause(docs[inx], anchors[inx], *offsets[inx], jobs=jobs)
                 continue
 
-            logger.debug(f"anchor tokens: {[t.text for t in doc if t._.anchor]}")
-            self.token_parser.update_extension(doc)
-            doc_lemma, joint_anchor_sent, joint_anchor_flag, joint_tuples = \
-                self.token_parser.joint_sentiment_anchor_setter(doc)
-            self.token_parser.anchor_badcase_postprocess(doc, doc_lemma)
-            anchor_tokens = [t.text for t in doc if t._.anchor] 
-            logger.debug(f"processed anchor tokens: {anchor_tokens}")
-            if not anchor_tokens:
-                logger.info(f"NO anchor tokens!!!")
+            entry = cached[inx]
+            if entry is None:
+                logger.info(f"parse clause: {_text} ")
+                doc = docs[inx]
+                _offsets = (token_offset, char_offset) if self.clause_cache is None else (0, 0)
+                extracted[inx] = self._extract_clause(doc, anchors[inx], *_offsets, jobs=jobs)
                 token_offset += len(doc)
-                if len(doc)>0:
-                    char_offset  += doc[-1].idx+len(doc[-1].text)     # 避免末尾是空格情况
+            else:
+                token_offset += entry.n_tokens
+
+        return extracted
+
+    def _assemble(self, clauses, docs, extracted, cached=None, offsets=None):
+        r''' 合并打分后的子句结果, 并维护子句在文档中的 token 偏移, char 偏移由分句结果给出
+        '''
+        results = []
+        if offsets is not None:
+            for inx, (_, _text) in enumerate(clauses):
+                if not _text or docs[inx] is None:
+                    continue
+                self._prefilter_verify(_text, extracted[inx])
+                results += extracted[inx]
+            return results
+
+        cached = cached or [None]*len(clauses)
+        token_offset = 0
+        for inx, (char_offset, _text) in enumerate(clauses):
+            if not _text:
                 continue
 
-            groups = self.phrase_parser(doc)
-
-            logger.debug(f"phrase_groups: {groups.phrase_groups}")
-            logger.debug(f"neg_groups: {groups.neg_group}")
-            logger.debug(f"cc_groups: {groups.cc_groups}")
-            logger.debug(f"poss_groups: {groups.poss_group}")
-            logger.debug(f"prt_groups: {groups.prt_group}")
-            logger.debug(f"xcomp_groups: {groups.xcomp_group}")
-            logger.debug(f"aux_groups: {groups.aux_group}")
-            logger.debug(f"joint_anchor_sent: {joint_anchor_sent}")
-
-            matches, groups.default_match_group = self.pattern_matcher(doc)
-            logger.info(f"pattern matches: {matches}")
-            logger.debug(f"default match group: {groups.default_match_group}")
-            _results = self.extractor(doc, matches, joint_anchor_flag, joint_tuples, \
-                    groups=groups, token_offset=token_offset, char_offset=char_offset)
-            self.sent_score(doc, groups, _results, joint_anchor_sent, anchor_type=doc._.anchor_type)
+            entry = cached[inx]
+            if entry is None and self.clause_cache is None:
+                _results = extracted[inx]
+                self._prefilter_verify(_text, _results)
+                results += _results
+                n_tokens = len(docs[inx])
+            else:
+                if entry is None:
+                    _results = extracted[inx]
+                    self._prefilter_verify(_text, _results)
+                    entry = ClauseEntry(len(docs[inx]), _results)
+                    self._cache_put(_text, entry)
+                else:
+                    logger.debug(f"[CACHE]: reuse clause entry: {_text} ")
+                results += [r.rebase(token_offset, char_offset) for r in entry.results]
+                n_tokens = entry.n_tokens
 
-            results += _results
-            token_offset += len(doc)
-            if len(doc)>0:
-                char_offset  += doc[-1].idx+len(doc[-1].text)     # 避免末尾是空格情况
+            token_offset += n_tokens
 
-        results = self.postprocessor(results)
+        return results
+
+    def _sent_score_batch(self, jobs_map):
+        r''' 跨文档批量情感打分, 批量打分失败时退化为逐文档打分
+        Args:
+            jobs_map: {doc_index: [(doc, groups, extract_results, joint_anchor_sent, anchor_type), ...]}
+        Returns:
+            {doc_index: Exception}, 打分失败的文档
+        '''
+        try:
+            self.sent_score.batch([job for jobs in jobs_map.values() for job in jobs])
+            return dict()
+        except Exception:
+            logger.warning(f"[BATCH]: sentiment batch failed, fallback to score per doc: {traceback.format_exc()}")
+
+        failed = dict()
+        for i, jobs in jobs_map.items():
+            try:
+                self.sent_score.batch(jobs)
+            except Exception as e:
+                logger.error(f"[BATCH]: doc [{i}] sentiment score failed: {traceback.format_exc()}")
+                failed[i] = e
+
+        return failed
 
-        if not coref or not corefmap:
+    @staticmethod
+    def _need_coref(results):
+        r''' 是否存在需要指代消解的结果(单 token 的 PRON holder/object)
+        '''
+        for result in results:
+            if result.holder_type=="PRON" and len(result.holder.tokenids)==1:
+                return True
+            if result.object_type=="PRON" and len(result.object.tokenids)==1:
+                return True
+        return False
+
+    def _may_need_coref(self, clauses, cached):
+        r''' 解析前判断是否可能需要指代消解: 存在待解析的子句, 或缓存结果中存在需要消解的 PRON;
+        所有子句均被预过滤或命中缓存且不含 PRON 时不再发起远程调用
+        '''
+        for (_, _text), entry in zip(clauses, cached):
+            if _text and (entry is None or self._need_coref(entry.results)):
+                return True
+        return False
+
+    def _coref_resolve(self, results, coref_future):
+        r''' 仅当结果中存在 PRON 时才等待指代消解结果, 否则取消调用;
+        cancel 只能取消尚未开始的调用, 已发出的远程请求不会中止, 只是不再等待其结果
+        '''
+        if not self._need_coref(results):
+            coref_future.cancel()
             return results
 
+        try:
+            corefmap = coref_future.result(timeout=self.coref_parser.timeout)
+        except Exception:
+            logger.error(f"coref parse failed: {traceback.format_exc()}")
+            corefmap = {}
+        logger.debug(f"coref map: {corefmap}")
+        if not corefmap:
+            return results
+
+        return self._coref_replace(results, corefmap)
+
+    def _coref_batch(self, texts, outputs):
+        r''' 批量远程指代消解, 跳过处理失败及结果中不含 PRON 的文档; outputs 原地更新
+        '''
+        inxs = [i for i, results in enumerate(outputs) \
+                    if isinstance(results, list) and self._need_coref(results)]
+        if not inxs:
+            return
+        try:
+            corefmaps = self.coref_parser.batch([texts[i] for i in inxs])
+        except Exception:
+            logger.error(f"[BATCH]: coref parse failed: {traceback.format_exc()}")
+            return
+
+        for i, corefmap in zip(inxs, corefmaps):
+            logger.debug(f"coref map: {corefmap}")
+            if not corefmap:
+                continue
+            try:
+                outputs[i] = self._coref_replace(outputs[i], corefmap)
+            except Exception as e:
+                logger.error(f"[BATCH]: doc [{i}] coref replace failed: {traceback.format_exc()}")
+                outputs[i] = e
+
+    def _local_coref(self, results, docs, offsets=None):
+        r''' 本地启发式指代消解
+        Args:
+            offsets: 整篇解析模式下与 docs 一一对应的 (token_offset, char_offset)
+        '''
+        if not self._need_coref(results):
+            return results
+
+        token_ids = []
+        for result in results:
+            if result.holder_type=="PRON" and len(result.holder.tokenids)==1:
+                token_ids.append(result.holder.tokenids[0] + result.token_offset)
+            if result.object_type=="PRON" and len(result.object.tokenids)==1:
+                token_ids.append(result.object.tokenids[0] + result.token_offset)
+        token_offsets = [offset[0] if offset else None for offset in offsets] if offsets else None
+        corefmap = self.coref_resolver(docs, token_ids, token_offsets)
+
+        return self._coref_replace(results, corefmap)
+
+    def _coref_replace(self, results, corefmap):
+        r''' 使用指代消解结果替换单 token 的 PRON holder/object
+        '''
         for result in results:
             token_offset = result.token_offset
             if result.holder_type=="PRON" and len(result.holder.tokenids)==1:
                 token_id = result.holder.tokenids[0] + token_offset
-                corefunit = corefmap[token_id]
-                if corefunit.coref_main:
+                corefunit = corefmap.get(token_id)
+                if corefunit and corefunit.coref_main:
                     result.holder.text = corefunit.coref_main
             if result.object_type=="PRON" and len(result.object.tokenids)==1:
                 token_id = result.object.tokenids[0] + token_offset
-                corefunit = corefmap[token_id]
-                if corefunit.coref_main:
+                corefunit = corefmap.get(token_id)
+                if corefunit and corefunit.coref_main:
                     result.object.text = corefunit.coref_main
 
         return results
-        
+
+    def _hypo_batch(self, texts_map):
+        r''' 跨文档批量虚拟语句判断, 批量判断失败时退化为逐文档判断
+        '''
+        try:
+            return self.hypo_detector.batch(texts_map)
+        except Exception:
+            logger.warning(f"[BATCH]: hypothetical batch failed, fallback to check per doc: {traceback.format_exc()}")
+
+        hypots = OrderedDict()
+        for i, _texts in texts_map.items():
+            try:
+                hypots[i] = self.hypo_detector(_texts)
+            except Exception as e:
+                logger.error(f"[BATCH]: doc [{i}] hypothetical check failed: {traceback.format_exc()}")
+                hypots[i] = e
+
+        return hypots
+
+    def _inte_batch(self, docs_map, parse_mode="clause"):
+        r''' 跨文档批量疑问语句判断, 只对非 None 的子句进行判断, 批量判断失败时退化为逐文档判断
+        Args:
+            docs_map: {doc_index: [Doc|None, ...]}
+            parse_mode: docs 的解析模式, 整篇解析与按子句解析的判断结果分别缓存
+        Returns:
+            {doc_index: [bool, ...]|Exception}, 与 docs_map 中子句一一对应
+        '''
+        def fill(docs, _inters):
+            _inter = iter(_inters)
+            return [next(_inter) if doc is not None else False for doc in docs]
+
+        inte_docs = OrderedDict((i, [doc for doc in docs if doc is not None]) \
+                                    for i, docs in docs_map.items())
+        try:
+            _inters = self.inte_detector.batch(inte_docs, parse_mode=parse_mode)
+            return OrderedDict((i, fill(docs, _inters[i])) for i, docs in docs_map.items())
+        except Exception:
+            logger.warning(f"[BATCH]: interrogative batch failed, fallback to check per doc: {traceback.format_exc()}")
+
+        inters = OrderedDict()
+        for i, docs in docs_map.items():
+            try:
+                inters[i] = fill(docs, self.inte_detector(inte_docs[i], parse_mode=parse_mode))
+            except Exception as e:
+                logger.error(f"[BATCH]: doc [{i}] interrogative check failed: {traceback.format_exc()}")
+                inters[i] = e
+
+        return inters
+
+    def _parse_batch(self, splits, batch_size=256, n_process=1):
+        r''' 使用 nlp.pipe 批量解析所有文档的子句, 批量解析失败时退化为逐文档解析
+        Args:
+            splits: {doc_index: [(char_start, clause_text), ...]}
+        Returns:
+            docs: {doc_index: [Doc|None, ...]}
+            failed: {doc_index: Exception}
+        '''
+        docs, failed = dict(), dict()
+        index, clause_texts = [], []
+        for i, clauses in splits.items():
+            docs[i] = [None] * len(clauses)
+            for j, (_, _text) in enumerate(clauses):
+                if _text:
+                    index.append((i, j))
+                    clause_texts.append(_text)
+
+        try:
+            parsed = self.token_parser.pipe(clause_texts, batch_size=batch_size, n_process=n_process)
+            for (i, j), doc in zip(index, parsed):
+                docs[i][j] = doc
+            return docs, failed
+        except Exception:
+            logger.warning(f"[BATCH]: pipe parse failed, fallback to parse per doc: {traceback.format_exc()}")
+
+        for i, clauses in splits.items():
+            try:
+                docs[i] = [self.token_parser(_text) if _text else None for _, _text in clauses]
+            except Exception as e:
+                logger.error(f"[BATCH]: doc [{i}] parse failed: {traceback.format_exc()}")
+                failed[i] = e
+
+        return docs, failed
+
+    def extract(self, text, coref=False):
+        r'''
+        config['parse_mode'] 为 document 时整篇解析, 不使用子句缓存;
+        config['prefilter'] 为 on 时不可能出现锚点的子句跳过句型判断、解析及抽取;
+        Args:
+            text: 评论文本
+            coref: 指代消解方式, [ False | True/"remote"(远程服务) | "local"(本地启发式) ]
+        '''
+        remote = coref in (True, "remote")
+        _texts, clauses = self._split(text)
+
+        if self.parse_mode == "document":
+            parsed = self._parse_document(text, clauses)
+            if parsed is not None:
+                docs, offsets = parsed
+                if self.prefilter is not None and coref != "local":
+                    docs = [doc if (_text and self.prefilter(_text)) else None \
+                                for doc, (_, _text) in zip(docs, clauses)]
+                # 远程指代消解异步调用, 与句型判断及抽取过程并行; 所有子句均被预过滤时不调用
+                coref_future = self.coref_parser.submit(text) \
+                                if remote and any(doc is not None for doc in docs) else None
+                anchors, failed = self._gate({0:docs}, {0:_texts}, parse_mode="document")
+                if failed:
+                    raise failed[0]
+                results = self._extract_clauses(clauses, docs, anchors[0], offsets=offsets)
+                return self._finish(results, docs, coref, coref_future, offsets)
+            logger.warning(f"clause boundaries not aligned, fallback to clause parse mode: {text}")
+
+        # 子句缓存及预过滤, 本地指代消解需要完整的解析结果, 均不使用
+        cached = [None] * len(clauses)
+        if self.clause_cache is not None and coref != "local":
+            cached = self._cache_lookup({0:clauses})[0]
+        if self.prefilter is not None and coref != "local":
+            self._prefilter_skip({0:clauses}, {0:cached})
+        # 远程指代消解异步调用, 与本地解析过程并行
+        coref_future = self.coref_parser.submit(text) \
+                        if remote and self._may_need_coref(clauses, cached) else None
+
+        # 只解析未命中缓存及未被预过滤的子句, 再依次经过锚点、疑问语句、虚拟语句过滤
+        docs = [self.token_parser(_text) if (_text and entry is None) else None \
+                    for (_, _text), entry in zip(clauses, cached)]
+        anchors, failed = self._gate({0:docs}, {0:_texts})
+        if failed:
+            raise failed[0]
+        results = self._extract_clauses(clauses, docs, anchors[0], cached)
+        self._cache_flush()
+
+        return self._finish(results, docs, coref, coref_future)
+
+    def _finish(self, results, docs, coref, coref_future, offsets=None):
+        r''' 后处理及指代消解
+        '''
+        results = self.postprocessor(results)
+
+        if coref == "local":
+            return self._local_coref(results, docs, offsets)
+        if coref_future is None:
+            return results
+
+        return self._coref_resolve(results, coref_future)
+
+    def extract_batch(self, texts, batch_size=256, n_process=1, coref=False):
+        r''' 批量抽取: 所有文档的子句统一通过 nlp.pipe 解析, 其余流程按子句处理;
+        单个文档处理异常不会影响其它文档;
+        Args:
+            texts: 文档列表
+            batch_size: nlp.pipe 批大小
+            n_process: nlp.pipe 进程数
+            coref: 指代消解方式, [ False | True/"remote"(远程服务) | "local"(本地启发式) ]
+        Returns:
+            与 texts 顺序一致的结果列表, 每个元素为对应文档的 ExtractResult 列表,
+            处理失败的文档对应其异常对象
+        '''
+        if self.parse_mode == "document" and not self._batch_mode_warned:
+            logger.warning("parse_mode [document] is not supported by extract_batch, use clause parse mode")
+            self._batch_mode_warned = True
+        outputs = [None] * len(texts)
+        use_cache = self.clause_cache is not None and coref != "local"
+        splits, _texts_map = dict(), OrderedDict()
+        for i, text in enumerate(texts):
+            try:
+                _texts_map[i], splits[i] = self._split(text)
+            except Exception as e:
+                logger.error(f"[BATCH]: doc [{i}] split failed: {traceback.format_exc()}")
+                outputs[i] = e
+
+        cached = self._cache_lookup(splits) if use_cache else \
+                    {i:[None]*len(clauses) for i, clauses in splits.items()}
+        if self.prefilter is not None and coref != "local":
+            self._prefilter_skip(splits, cached)
+
+        # 只解析未命中缓存及未被预过滤的子句
+        misses = {i: [(char_start, _text if entry is None else '') \
+                        for (char_start, _text), entry in zip(clauses, cached[i])] \
+                    for i, clauses in splits.items()}
+        docs, failed = self._parse_batch(misses, batch_size=batch_size, n_process=n_process)
+        for i, e in failed.items():
+            outputs[i] = e
+            splits.pop(i)
+
+        # 过滤链: 锚点 -> 疑问语句 -> 虚拟语句, 各级跨文档批量执行
+        anchors, failed = self._gate(OrderedDict((i, docs[i]) for i in splits), \
+                                     OrderedDict((i, _texts_map[i]) for i in splits))
+        for i, e in failed.items():
+            outputs[i] = e
+            splits.pop(i)
+
+        # 所有文档的子句抽取完成后统一批量情感打分
+        jobs, extracted = OrderedDict(), dict()
+        for i, clauses in splits.items():
+            try:
+                jobs[i] = []
+                extracted[i] = self._extract_pending(clauses, docs[i], anchors[i], jobs[i], cached[i])
+            except Exception as e:
+                logger.error(f"[BATCH]: doc [{i}] extract failed: {traceback.format_exc()}")
+                outputs[i] = e
+                jobs.pop(i)
+        for i, e in self._sent_score_batch(jobs).items():
+            outputs[i] = e
+            extracted.pop(i)
+
+        for i, clauses in splits.items():
+            if i not in extracted:
+                continue
+            try:
+                results = self._assemble(clauses, docs[i], extracted[i], cached[i])
+                results = self.postprocessor(results)
+                if coref == "local":
+                    results = self._local_coref(results, docs[i])
+                outputs[i] = results
+            except Exception as e:
+                logger.error(f"[BATCH]: doc [{i}] extract failed: {traceback.format_exc()}")
+                outputs[i] = e
+
+        # 抽取完成后只对结果中存在需要消解的 PRON 的文档批量调用远程指代消解
+        if coref in (True, "remote"):
+            self._coref_batch(texts, outputs)
+        if use_cache:
+            self._cache_flush()
+
+        return outputs
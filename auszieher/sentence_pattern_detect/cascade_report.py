@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# coding=utf-8
+#================================================================
+#   Copyright (C) 2022 Fisher. All rights reserved.
+#
+#   文件名称：cascade_report.py
+#   创建日期：2026年10月18日
+#   描    述：虚拟语句级联模式召回率及耗时报告, 以完整模型的判断结果为基准
+#
+# e.g.: python -m auszieher.sentence_pattern_detect.cascade_report -i ./diff/test_set
+#
+#================================================================
+
+import os
+import json
+import time
+import argparse
+
+from .src.commons import config, split_sentence
+from .src.model import Model, MAX_LENGTH
+
+
+def load_clauses(path):
+    clauses = []
+    with open(path, 'r', encoding='utf-8') as rf:
+        for line in rf:
+            clauses.extend([_ for _ in split_sentence(line.strip()) if _.strip()])
+    return clauses
+
+def count_batches(model, clauses, lang):
+    if not clauses:
+        return 0
+    encodings = model.lang2tokenizer[lang](clauses, max_length=MAX_LENGTH, truncation=True)
+    return len(model._batches([len(input_ids) for input_ids in encodings['input_ids']]))
+
+def report(model, clauses, lang):
+    cascade = model.lang2cascade[lang]
+
+    start = time.time()
+    full_result = model._process(clauses, lang)
+    full_cost = time.time() - start
+
+    start = time.time()
+    cascade_result = model.process(clauses, lang)
+    cascade_cost = time.time() - start
+
+    candidates = [cascade(clause) for clause in clauses]
+    positives = [i for i, (label, _) in enumerate(full_result) if label == 1]
+    missed = [clauses[i] for i in positives if not candidates[i]]
+    changed = [clauses[i] for i, (full, casc) in enumerate(zip(full_result, cascade_result)) \
+                    if full[0] != casc[0]]
+    n_candidates = sum(candidates)
+
+    return {
+        "clauses": len(clauses),
+        "candidates": n_candidates,
+        "candidate_ratio": round(n_candidates/len(clauses), 4) if clauses else 0.0,
+        "model_batches": {"full": count_batches(model, clauses, lang),
+                          "cascade": count_batches(model, [clause for clause, candidate in zip(clauses, candidates) if candidate], lang)},
+        "positives": len(positives),
+        "recall": round(1 - len(missed)/len(positives), 4) if positives else 1.0,
+        "latency_ms": {"full": round(full_cost*1000, 2), "cascade": round(cascade_cost*1000, 2)},
+        "missed": missed,
+        "changed": changed,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", "-i", help="corpus file path, one document per line", \
+                        default="./diff/test_set")
+    parser.add_argument("--lang", "-l", help="language, [ en | zh ]", default="en")
+    parser.add_argument("--output", "-o", help="json report output path", default=None)
+    args = parser.parse_args()
+
+    model = Model(os.path.join(config['DATA_DIR'], 'hypo'), batch_size=config['BATCH_SIZE'], cascade=True)
+    if model.lang2cascade.get(args.lang) is None:
+        parser.error(f"no cascade markers for language: {args.lang}")
+
+    result = report(model, load_clauses(args.input), args.lang)
+    print(f"clauses: {result['clauses']}, candidates: {result['candidates']} "
+          f"({result['candidate_ratio']}), model batches: {result['model_batches']}")
+    print(f"positives: {result['positives']}, recall: {result['recall']}, latency(ms): {result['latency_ms']}")
+    for clause in result['missed']:
+        print(f"\tMISSED: {clause}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as wf:
+            json.dump(result, wf, ensure_ascii=False, indent=2)
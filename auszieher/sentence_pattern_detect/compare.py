@@ -1,37 +1,251 @@
 # python -m transformers.onnx --model=./checkpoint-1500/ --feature=sequence-classification onnx/ 模型导出
+# e.g.: python compare.py -t onnx       torch 与 onnx 模型输出一致性及耗时对比(需要 torch)
+#       python compare.py -t startup    推理路径(无 torch/pandas)与原路径的启动耗时及内存对比
+#       python compare.py -t bench -m all --variants fp32,int8 \
+#              --threads 1x1,4x1 --batch-sizes 1,8,32 --lengths natural,short,long -o bench.json
+#                                       虚拟语句/情感模型基准测试, 每组配置独立进程, 输出 JSON
+# 数据路径(config.yaml DATA_DIR, 语料等)按项目根目录解析, 可在任意目录执行
+import os
+import re
+import sys
+import json
 import time
+import random
+import itertools
+import argparse
+import subprocess
 
 import numpy as np
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-from onnxruntime import InferenceSession
 
-model_path = './data/checkpoint-1500'
-tokenizer = AutoTokenizer.from_pretrained(model_path)
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(os.path.dirname(PACKAGE_DIR))
+sys.path[:0] = [PACKAGE_DIR, PROJECT_DIR]
+
+from src.commons.configer import config
+
+# 与线上服务(src/server.py)一致, 模型目录由 config.yaml DATA_DIR 给出
+HYPO_DIR = os.path.join(PROJECT_DIR, config['DATA_DIR'], 'hypo')
+model_path = os.path.join(PROJECT_DIR, 'data/checkpoint-1500')
+onnx_path = os.path.join(HYPO_DIR, 'en/model.onnx')
 
 COUNT = 5
 query = "Using DistilBERT with ONNX Runtime!"
 
-model = AutoModelForSequenceClassification.from_pretrained(model_path)
-inputs = tokenizer(query, return_tensors="pt")
-model.eval()
-start_time = time.time()
-for i in range(COUNT):
-    torch_out = model(**inputs)
-end_time = time.time()
-print(f'torch cost time:{end_time - start_time}')
 
-onnx_path = './data/hypo/en/model.onnx'
-session = InferenceSession(onnx_path)
-inputs = tokenizer(query, return_tensors="np")
-start_time = time.time()
-for i in range(COUNT):
-    ort_outs = session.run(output_names=["logits"], input_feed=dict(inputs))
-end_time = time.time()
-print(f'torch cost time:{end_time - start_time}')
+def compare_onnx():
+    # torch 只用于导出前的一致性校验, 推理路径不依赖 torch
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+    from onnxruntime import InferenceSession
+
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model = AutoModelForSequenceClassification.from_pretrained(model_path)
+    inputs = tokenizer(query, return_tensors="pt")
+    model.eval()
+    start_time = time.time()
+    for i in range(COUNT):
+        torch_out = model(**inputs)
+    end_time = time.time()
+    print(f'torch cost time:{end_time - start_time}')
+
+    session = InferenceSession(onnx_path)
+    inputs = tokenizer(query, return_tensors="np")
+    start_time = time.time()
+    for i in range(COUNT):
+        ort_outs = session.run(output_names=["logits"], input_feed=dict(inputs))
+    end_time = time.time()
+    print(f'onnx cost time:{end_time - start_time}')
+
+    def to_numpy(tensor):
+        return tensor.detach().cpu().numpy() if tensor.requires_grad else tensor.cpu().numpy()
+
+    np.testing.assert_allclose(to_numpy(torch_out.logits), ort_outs[0], rtol=1e-03, atol=1e-05)
+
+
+# 在独立进程中统计 import 耗时、模型加载耗时及峰值内存(ru_maxrss)
+STARTUP_SCRIPT = '''
+import json, time, resource
+start = time.time()
+{imports}
+import_time = time.time() - start
+import sys
+sys.path.insert(0, {package_dir!r})
+from src.model import Model
+start = time.time()
+Model({hypo_dir!r}, logger=__import__('logging').getLogger(), variant={variant!r})
+load_time = time.time() - start
+print(json.dumps({{"import_s": round(import_time, 3), "load_s": round(load_time, 3),
+                  "maxrss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024, 1)}}))
+'''
+STARTUP_CASES = {
+    "numpy": "import numpy, onnxruntime, transformers",
+    "torch+pandas": "import numpy, onnxruntime, transformers, torch, pandas",
+}
+
+
+def compare_startup(variant='fp32'):
+    for name, imports in STARTUP_CASES.items():
+        script = STARTUP_SCRIPT.format(imports=imports, hypo_dir=HYPO_DIR, package_dir=PACKAGE_DIR,
+                                       variant=variant)
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True)
+        if output.returncode != 0:
+            print(f'{name}: failed, {output.stderr.strip().splitlines()[-1:]}')
+            continue
+        stats = json.loads(output.stdout.strip().splitlines()[-1])
+        print(f'{name}: import {stats["import_s"]}s, load {stats["load_s"]}s, maxrss {stats["maxrss_mb"]}MB')
+
+
+# 基准测试: 模型路径与线上配置一致(config.yaml DATA_DIR 及 SentScore)
+BENCH_MODELS = ["hypo", "sentiment"]
+# 情感模型输入最多 10 个词(与 SentScore._gen_token_batch 一致)
+SENTIMENT_MAX_WORDS = 10
+BENCH_SCRIPT = '''
+import sys, json
+sys.path.insert(0, {package_dir!r})
+from compare import run_benchmark
+print(json.dumps(run_benchmark(json.load(sys.stdin))))
+'''
+
+
+def load_bench_clauses(path):
+    from src.commons import split_sentence
+
+    clauses = []
+    with open(path, 'r', encoding='utf-8') as rf:
+        for line in rf:
+            clauses.extend([_.strip() for _ in split_sentence(line.strip()) if _.strip()])
+    return clauses
+
+def sample_clauses(clauses, lengths, samples, seed=0):
+    r''' 按长度分布采样子句
+    Args:
+        lengths: natural(按语料原始分布) | short(最短 1/3) | long(最长 1/3)
+    '''
+    rng = random.Random(seed)
+    ranked = sorted(clauses, key=lambda clause: len(clause.split()))
+    third = max(1, len(ranked) // 3)
+    pools = {"natural": clauses, "short": ranked[:third], "long": ranked[-third:]}
+    pool = pools[lengths]
+    return [rng.choice(pool) for _ in range(samples)]
+
+def run_benchmark(config):
+    r''' 在当前进程中测试一组配置: 加载模型后预热一次, 按 batch 计时, 返回吞吐量、延迟分位数及峰值内存
+    '''
+    import logging
+    import resource
+
+    clauses = sample_clauses(load_bench_clauses(config["input"]), config["lengths"], config["samples"], config["seed"])
+    name, variant, batch_size = config["model"], config["variant"], config["batch_size"]
+    threads = dict(intra_op_threads=config["intra_op_threads"], inter_op_threads=config["inter_op_threads"])
+    start = time.time()
+    if name == "hypo":
+        from src.model import Model
+
+        model = Model(HYPO_DIR, batch_size=batch_size, logger=logging.getLogger(), variant=variant, **threads)
+        loaded = model.lang2variant.get('en')
+        inputs = clauses
+        infer = lambda batch: model._process(batch, 'en')
+    else:
+        from auszieher.src.sent_score import SentScore
+
+        model = SentScore(None, variant=variant, io_binding=config["io_binding"], max_batch=batch_size, **threads)
+        loaded = model.variant
+        inputs = [re.findall(r"[\w'-]+", clause.lower())[:SENTIMENT_MAX_WORDS] for clause in clauses]
+        infer = model._stanza_model_onnx_score
+    load_time = time.time() - start
+    if loaded != variant:
+        return {"error": f"variant [{variant}] not found"}
+
+    batches = [inputs[i:i+batch_size] for i in range(0, len(inputs), batch_size)]
+    infer(batches[0])
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(config["repeat"]):
+        for batch in batches:
+            batch_start = time.perf_counter()
+            infer(batch)
+            latencies.append(time.perf_counter() - batch_start)
+    cost = time.perf_counter() - start
+
+    latencies = np.array(latencies) * 1000
+    return {"mean_words": round(float(np.mean([len(clause.split()) for clause in clauses])), 1),
+            "load_s": round(load_time, 3),
+            "throughput": round(len(inputs) * config["repeat"] / cost, 1),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+            "maxrss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024, 1)}
 
+def bench(models, variants, threads, batch_sizes, lengths, samples=512, repeat=3, path='./diff/test_set', seed=0,
+          io_bindings=(True,)):
+    r''' 遍历配置组合, 每组配置在独立进程中采样子句并测试, 避免模型加载及内存统计相互影响;
+    采样使用固定随机种子, 相同长度分布的配置输入一致; 子进程在项目根目录执行(SentScore 词典按相对路径加载)
+    '''
+    script = BENCH_SCRIPT.format(package_dir=PACKAGE_DIR)
+    path = os.path.abspath(path)
+    results = []
+    for _lengths in lengths:
+        for name in models:
+            for variant in variants:
+                for intra_op_threads, inter_op_threads in threads:
+                    # IOBinding 只用于情感模型
+                    for batch_size, io_binding in itertools.product(batch_sizes, \
+                                                    io_bindings if name == "sentiment" else (False,)):
+                        config = {"model": name, "variant": variant, "intra_op_threads": intra_op_threads,
+                                  "inter_op_threads": inter_op_threads, "batch_size": batch_size,
+                                  "io_binding": io_binding,
+                                  "lengths": _lengths, "samples": samples, "repeat": repeat,
+                                  "input": path, "seed": seed}
+                        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                                                input=json.dumps(config), cwd=PROJECT_DIR)
+                        if output.returncode != 0:
+                            stats = {"error": (output.stderr.strip().splitlines() or [''])[-1]}
+                        else:
+                            stats = json.loads(output.stdout.strip().splitlines()[-1])
+                        result = dict(config, **stats)
+                        print(json.dumps(result), file=sys.stderr)
+                        results.append(result)
 
-def to_numpy(tensor):
-    return tensor.detach().cpu().numpy() if tensor.requires_grad else tensor.cpu().numpy()
+    return {"input": path, "seed": seed, "cpu_count": os.cpu_count(), "results": results}
 
 
-np.testing.assert_allclose(to_numpy(torch_out.logits), ort_outs[0], rtol=1e-03, atol=1e-05)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--task", "-t", help="task name, [ onnx | startup | bench ]", default="onnx")
+    parser.add_argument("--model", "-m", help="bench: model name, [ hypo | sentiment | all ]", default="all")
+    parser.add_argument("--variants", help="bench: model variants, comma separated", default="fp32,int8")
+    parser.add_argument("--threads", help="bench: intra x inter op threads, comma separated, 0 is default", \
+                        default="0x0,1x1,2x1,4x1")
+    parser.add_argument("--batch-sizes", help="bench: batch sizes, comma separated", default="1,8,32")
+    parser.add_argument("--lengths", help="bench: clause length distributions, [ natural | short | long ]", \
+                        default="natural,short,long")
+    parser.add_argument("--io-binding", help="bench: sentiment model io binding, [ on | off | on,off ]", \
+                        default="on")
+    parser.add_argument("--samples", help="bench: sampled clauses per config", type=int, default=512)
+    parser.add_argument("--repeat", help="bench: timed passes over the samples", type=int, default=3)
+    parser.add_argument("--seed", help="bench: sampling seed", type=int, default=0)
+    parser.add_argument("--input", "-i", help="bench: corpus file path, one document per line", \
+                        default=os.path.join(PROJECT_DIR, "diff/test_set"))
+    parser.add_argument("--output", "-o", help="bench: json report output path", default=None)
+    args = parser.parse_args()
+    if args.task == "onnx":
+        compare_onnx()
+    elif args.task == "startup":
+        compare_startup()
+    elif args.task == "bench":
+        if args.model not in BENCH_MODELS + ["all"]:
+            parser.error(f"illegal model: {args.model}")
+        lengths = args.lengths.split(',')
+        if any(_ not in ("natural", "short", "long") for _ in lengths):
+            parser.error(f"illegal lengths: {args.lengths}")
+        report = bench(BENCH_MODELS if args.model == "all" else [args.model],
+                       args.variants.split(','),
+                       [tuple(int(_) for _ in pair.split('x')) for pair in args.threads.split(',')],
+                       [int(_) for _ in args.batch_sizes.split(',')],
+                       lengths, samples=args.samples, repeat=args.repeat, path=args.input, seed=args.seed,
+                       io_bindings=[_ == "on" for _ in args.io_binding.split(',')])
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as wf:
+                json.dump(report, wf, indent=2)
+        else:
+            print(json.dumps(report, indent=2))
+    else:
+        parser.error(f"illegal task: {args.task}")
@@ -1,2 +1,3 @@
 from .model import Model
 from .server import Server
+from .cascade import KeywordCascade
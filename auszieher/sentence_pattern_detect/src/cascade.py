@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# coding=utf-8
+#================================================================
+#   Copyright (C) 2022 Fisher. All rights reserved.
+#
+#   文件名称：cascade.py
+#   创建日期：2026年10月18日
+#   描    述：虚拟语句级联预判: 基于标记词的高召回预分类, 只有候选句送入 transformer 模型
+#
+#================================================================
+
+import os
+import re
+
+# 标记词, `*` 结尾表示前缀匹配(如 would* 匹配 wouldn't/would've), 以 ' 开头表示缩写后缀(如 i'd)
+DEFAULT_MARKERS = {
+    'en': [
+        "if", "if only", "unless", "whether", "in case", "otherwise", "rather", "instead",
+        "would*", "could*", "should*", "might*", "must*", "ought*", "may", "maybe", "perhaps",
+        "wish*", "hope*", "hoping", "want*", "wanna", "need*", "prefer*", "expect*", "wonder*",
+        "suppos*", "imagin*", "assum*", "pretend*", "lest", "as though", "as if",
+        "were i", "were it", "were they", "were we", "were you", "had i", "had it", "had they",
+        "had we", "had you", "'d", "’d",
+    ],
+    'zh': [
+        "如果", "假如", "假设", "假使", "要是", "若是", "倘若", "如若", "万一", "即使", "哪怕",
+        "希望", "但愿", "要能", "就好了", "该多好", "应该", "最好", "建议", "宁愿", "想要",
+    ],
+}
+CASCADE_MARKERS_FILE = 'cascade_markers.txt'
+
+
+class KeywordCascade:
+    """
+    虚拟语句预分类器: 不包含任何标记词的句子直接判定为非虚拟语句
+    标记词按召回优先选取, 新增标记词可写入模型目录下的 cascade_markers.txt
+    """
+    def __init__(self, markers, lang='en'):
+        self.markers = list(markers)
+        patterns = []
+        for marker in self.markers:
+            prefix = marker.endswith('*')
+            marker = marker.rstrip('*').lower()
+            body = r'\s+'.join(re.escape(word) for word in marker.split())
+            # 中文不区分词边界; 缩写后缀要求紧跟在词之后
+            if lang == 'zh':
+                patterns.append(body)
+                continue
+            head = r'(?<=\w)' if marker[0] in "'’" else r'\b'
+            tail = '' if prefix else r'\b'
+            patterns.append(f'{head}{body}{tail}')
+        self.pattern = re.compile('|'.join(patterns)) if patterns else None
+
+    @classmethod
+    def load(cls, lang_dir, lang):
+        """
+        优先读取模型目录下的标记词文件, 否则使用默认标记词; 没有标记词的语种返回 None
+        """
+        path = os.path.join(lang_dir, CASCADE_MARKERS_FILE)
+        if os.path.isfile(path):
+            with open(path, encoding='utf-8') as fp:
+                markers = [line.strip() for line in fp if line.strip() and line[0] != '#']
+        else:
+            markers = DEFAULT_MARKERS.get(lang)
+        if not markers:
+            return None
+        return cls(markers, lang=lang)
+
+    def __call__(self, text):
+        """
+        是否为虚拟语句候选
+        """
+        if self.pattern is None:
+            return True
+        return self.pattern.search(text.lower()) is not None
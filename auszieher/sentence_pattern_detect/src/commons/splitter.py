@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# coding=utf-8
+#================================================================
+#   Copyright (C) 2022 Fisher. All rights reserved.
+#
+#   文件名称：splitter.py
+#   创建日期：2026年10月18日
+#   描    述：流式分句: 单次扫描文档, 逐个返回子句在原文中的位置及子句文本;
+#             auszieher.utils.splitter 与本包的 split_sentence 共用此实现
+#
+#================================================================
+
+import re
+from typing import Iterator, Tuple
+
+_punct = (
+    r"… …… , : . ; ! ? ¿ ؟ ¡ ( ) [ ] { } < > _ # * & 。 ？ ！ ， 、 ； ： ～ · । ، ۔ ؛ ٪"
+)
+split_chars = lambda char: list(char.strip().split(" "))
+
+PUNCT_SET = set(split_chars(_punct))
+
+# 断句位置: 断句符(后面不是引号), 断句符后的引号, 换行符(同 str.splitlines)
+_LINE_BREAK = r'\r\n|[\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]'
+_BREAK_PATTERNS = {
+    "zh" : re.compile(f'[。？！…](?![”’"\'])|(?<=[。？！…])[”’"\']|(?P<line>{_LINE_BREAK})'),
+    "en" : re.compile(f'[.?!](?![”’"\'])|(?<=[?!.])["\']|(?P<line>{_LINE_BREAK})'),
+    "all": re.compile(f'[。？！….?!](?![”’"\'])|(?<=[。？！.!?…])[”’"\']|(?P<line>{_LINE_BREAK})'),
+}
+
+def _iter_segments(document: str, flag: str) -> Iterator[Tuple[int, int]]:
+    """
+    按断句符及换行切分, 返回片段在原文中的起止位置, 换行符不属于任何片段
+    """
+    pattern = _BREAK_PATTERNS.get(flag, _BREAK_PATTERNS["all"])
+    start = 0
+    for match in pattern.finditer(document):
+        if match.group("line") is not None:
+            yield start, match.start()
+        else:
+            yield start, match.end()
+        start = match.end()
+    yield start, len(document)
+
+def _iter_pieces(document: str, flag: str, limit: int, strip: bool = False) -> Iterator[Tuple[int, int]]:
+    """
+    超过 limit 的片段按 limit 截断, 跳过空片段; strip 为 True 时先去掉片段首尾的空白
+    """
+    for start, end in _iter_segments(document, flag):
+        if strip:
+            while start < end and document[start].isspace():
+                start += 1
+            while end > start and document[end-1].isspace():
+                end -= 1
+        for s in range(start, end, limit):
+            yield s, min(s+limit, end)
+
+def iter_sentences(document: str, flag: str = "all", limit: int = 10000) -> Iterator[Tuple[int, int, str]]:
+    """
+    流式分句, 分句及合并规则与原 split_sentence 一致:
+    1. 片段开头的标点合并到上一个子句末尾;
+    2. 长度不超过4的片段(非首个、非最后一个)与下一个片段合并;
+    Args:
+        document:
+        flag: Type:str, "all" 中英文标点分句，"zh" 中文标点分句，"en" 英文标点分句
+        limit: 单句最大长度
+    Returns:
+        (start, end, text) 迭代器, start/end 为子句在原文中的起止位置;
+        子句跨越换行符合并时, text 不包含换行符, 与 document[start:end] 不一致
+    """
+    pieces = _iter_pieces(document, flag, limit)
+    first = next(pieces, None)
+    if first is None:
+        return
+    current = [first[0], first[1], document[first[0]:first[1]]]
+
+    piece = next(pieces, None)
+    while piece is not None:
+        start, end = piece
+        j = start
+        while j < end and document[j] in PUNCT_SET:
+            j += 1
+        if j > start:
+            current[1] = j
+            current[2] += document[start:j]
+        piece = next(pieces, None)
+        if j == end:
+            continue
+
+        if end-j <= 4 and piece is not None:
+            yield tuple(current)
+            current = [j, piece[1], document[j:end]+document[piece[0]:piece[1]]]
+            piece = next(pieces, None)
+        else:
+            yield tuple(current)
+            current = [j, end, document[j:end]]
+
+    yield tuple(current)
+
+def iter_stripped_sentences(document: str, flag: str = "all", limit: int = 510) -> Iterator[Tuple[int, int, str]]:
+    """
+    流式分句, 子句去掉首尾空白, 不做标点合并; 长度不超过4的子句(非最后一个)与下一个子句合并
+    Args:
+        document:
+        flag: Type:str, "all" 中英文标点分句，"zh" 中文标点分句，"en" 英文标点分句
+        limit: 单句最大长度
+    Returns:
+        (start, end, text) 迭代器, 说明同 iter_sentences
+    """
+    pieces = _iter_pieces(document, flag, limit, strip=True)
+    piece = next(pieces, None)
+    while piece is not None:
+        start, end = piece
+        following = next(pieces, None)
+        if end-start <= 4 and following is not None:
+            yield start, following[1], document[start:end]+document[following[0]:following[1]]
+            piece = next(pieces, None)
+        else:
+            yield start, end, document[start:end]
+            piece = following
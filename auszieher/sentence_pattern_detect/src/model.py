@@ -1,12 +1,37 @@
 from transformers import AutoTokenizer
-import torch
 import numpy as np
-import onnxruntime
-import pandas as pd
+import csv
 import os
 
+from .cascade import KeywordCascade
+from .model_variant import variants_file, resolve_model_path, make_session
+
+MAX_LENGTH = 128
+
+
+def softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def load_label_threshold(path):
+    """
+    读取两列(label, threshold)无表头的阈值文件
+    """
+    label_list, threshold_list = [], []
+    with open(path, encoding='utf-8', newline='') as fp:
+        for row in csv.reader(fp):
+            if not row:
+                continue
+            label_list.append(row[0])
+            threshold_list.append(float(row[1]))
+    return label_list, threshold_list
+
+
 class Model:
-    def __init__(self, data_dir, batch_size=8, logger = None):
+    def __init__(self, data_dir, batch_size=8, logger = None, cascade=False, token_budget=None, variant='auto',
+                 intra_op_threads=0, inter_op_threads=0):
         if logger is None:
             from .commons.logger import logger
             self.logger = logger
@@ -17,7 +42,18 @@ class Model:
         self.lang2tokenizer = {}
         self.lang2label_id2label = {}
         self.lang2label2threshold = {}
+        self.lang2label_mask = {}
+        # 模型变体: fp32 | int8 | auto(使用 quantize_tool.py 校验后激活的变体)
+        self.lang2variant = {}
+        self.data_dir = data_dir
         self.batch_size = batch_size
+        # 按 token 预算组 batch: 输入按长度排序后, batch 行数 * 最大长度不超过预算,
+        # 默认预算与原固定 batch_size 的最大 padding 尺寸一致
+        self.token_budget = token_budget or batch_size * MAX_LENGTH
+        # 级联模式: 先用标记词预分类, 只有候选句送入 transformer 模型
+        self.cascade = cascade
+        self.lang2cascade = {}
+        self.cascade_stats = {'total': 0, 'candidates': 0}
 
         for lang in ['zh', 'en']:  # 根据语种区分文件夹
             dirname = lang
@@ -28,50 +64,90 @@ class Model:
             tokenizer = AutoTokenizer.from_pretrained(tmp_tokenizer_path)
 
             tmp_label_threshold_path = os.path.join(data_dir, dirname, 'label_threshold.csv')
-            label_threshold_df = pd.read_csv(tmp_label_threshold_path, header=None)  # 兼容没有label.csv的情况
-            label_list = label_threshold_df[0].tolist()
+            label_list, threshold_list = load_label_threshold(tmp_label_threshold_path)
             label_id2label = {}
             label2label_id = {}
             label2threshold = {}
             for i, label in enumerate(label_list):
                 label_id2label[i] = label
                 label2label_id[label] = i
-                label2threshold[label] = label_threshold_df[1][i]
+                label2threshold[label] = threshold_list[i]
 
             # 验证onnx模型是否一致
-            tmp_model_path = os.path.join(data_dir, dirname, 'model.onnx')
-            model = onnxruntime.InferenceSession(tmp_model_path)
+            tmp_model_path, self.lang2variant[lang] = resolve_model_path(
+                os.path.join(data_dir, dirname, 'model.onnx'), 'hypo', variants_file(data_dir), variant,
+                logger=self.logger)
+            model = make_session(tmp_model_path, intra_op_threads, inter_op_threads)
 
             self.lang2model[lang] = model
             self.lang2label_id2label[lang] = label_id2label
             self.lang2tokenizer[lang] = tokenizer
             self.lang2label2threshold[lang] = label2threshold
-            self.logger.info(f'load {lang} model success.')
+            # 按 label id 排列的阈值及"其他"类别掩码, 用于按 batch 向量化判断
+            self.lang2label_mask[lang] = (np.array(threshold_list, dtype=np.float64),
+                                          np.array([label == '其他' for label in label_list]))
+            if cascade:
+                self.lang2cascade[lang] = KeywordCascade.load(os.path.join(data_dir, dirname), lang)
+            self.logger.info(f'load {lang} model success, variant: {self.lang2variant[lang]}.')
 
     def process(self, text_list, lang):
+        """
+        级联模式下未通过预分类的句子直接返回 (0, 1.0), 其余句子由模型判断
+        """
+        cascade = self.lang2cascade.get(lang)
+        if cascade is None:
+            return self._process(text_list, lang)
+
+        candidates = [i for i, text in enumerate(text_list) if cascade(text)]
+        self.cascade_stats['total'] += len(text_list)
+        self.cascade_stats['candidates'] += len(candidates)
+        result = [(0, 1.0)] * len(text_list)
+        if candidates:
+            candidate_result = self._process([text_list[i] for i in candidates], lang)
+            for i, label_proba in zip(candidates, candidate_result):
+                result[i] = label_proba
+        return result
+
+    def _batches(self, lengths):
+        """
+        按 token 长度排序后分组, 每组 padding 后的 token 数(行数 * 组内最大长度)不超过 token_budget
+        """
+        batches, batch = [], []
+        for i in sorted(range(len(lengths)), key=lengths.__getitem__):
+            if batch and (len(batch) + 1) * lengths[i] > self.token_budget:
+                batches.append(batch)
+                batch = []
+            batch.append(i)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _process(self, text_list, lang):
         result = []  # 返回结果
+        if not text_list:
+            return result
 
-        total_proba_list = []
-        for i in range(0, len(text_list), self.batch_size):
-            tmp_text_list = text_list[i:i + self.batch_size]
-            inputs = self.lang2tokenizer[lang](tmp_text_list, padding=True, max_length=128, truncation=True,
-                                               return_tensors='np')
+        # 只分词一次, 分组后再按组内最大长度 padding
+        tokenizer = self.lang2tokenizer[lang]
+        encodings = tokenizer(text_list, max_length=MAX_LENGTH, truncation=True)
+        lengths = [len(input_ids) for input_ids in encodings['input_ids']]
+        total_proba = None
+        for batch in self._batches(lengths):
+            features = {key: [encodings[key][i] for i in batch] for key in encodings.keys()}
+            inputs = tokenizer.pad(features, padding=True, return_tensors='np')
             onnx_outputs = self.lang2model[lang].run(output_names=["logits"], input_feed=dict(inputs))
-            proba_list = torch.softmax(torch.tensor(onnx_outputs[0]), dim=1).cpu().tolist()
-            total_proba_list.extend(proba_list)
-            label2threshold = self.lang2label2threshold[lang]
-            label_id2label = self.lang2label_id2label[lang]
-
-            # 0是其他, 1是假设型
-            for proba in proba_list:
-                index = np.argmax(proba)
-                if label_id2label[index] == '其他':
-                    result.append((0, proba[index]))
-                else:
-                    if proba[index] >= label2threshold[label_id2label[index]]:
-                        result.append((1, proba[index]))
-                    else:
-                        result.append((0, 1 - proba[index]))
-        assert len(text_list) == len(total_proba_list), 'inputted sample number not equal returned sample number'
-        self.logger.info(f'proba result:{total_proba_list}')
+            proba = softmax(onnx_outputs[0])
+            if total_proba is None:
+                total_proba = np.empty((len(text_list), proba.shape[1]), dtype=proba.dtype)
+            # 按原始顺序写回
+            total_proba[batch] = proba
+
+        # 0是其他, 1是假设型: 非"其他"类别且概率不低于阈值时为假设型, 否则返回非假设型的概率
+        thresholds, is_other = self.lang2label_mask[lang]
+        index = total_proba.argmax(axis=1)
+        top_proba = total_proba[np.arange(len(text_list)), index]
+        labels = ~is_other[index] & (top_proba >= thresholds[index])
+        probs = np.where(is_other[index] | labels, top_proba, 1 - top_proba)
+        result = [(int(label), float(prob)) for label, prob in zip(labels, probs)]
+        self.logger.info(f'proba result:{total_proba.tolist()}')
         return result
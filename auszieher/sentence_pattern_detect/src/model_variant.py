@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# coding=utf-8
+#================================================================
+#   Copyright (C) 2022 Fisher. All rights reserved.
+#
+#   文件名称：model_variant.py
+#   创建日期：2026年10月18日
+#   描    述：ONNX 模型变体(fp32/int8)选择: 变体文件与原模型同目录, 以 <name>.<variant>.onnx 命名;
+#             变体经 quantize_tool.py 校验通过后写入 variants.json 激活, variants.json 位于各模型
+#             目录的上级目录(即配置的 DATA_DIR, e.g. data/model/hypo -> data/model/variants.json)
+#
+#================================================================
+
+import os
+import json
+import logging
+
+import onnxruntime
+
+VARIANTS_FILE_NAME = 'variants.json'
+DEFAULT_VARIANT = 'fp32'
+
+
+def variants_file(model_dir):
+    """
+    模型目录(e.g. data/model/hypo, data/model/sentiment)对应的变体激活文件
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(model_dir)), VARIANTS_FILE_NAME)
+
+
+def variant_path(path, variant):
+    """
+    模型变体文件路径, e.g. model.onnx -> model.int8.onnx
+    """
+    if variant == DEFAULT_VARIANT:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{variant}{ext}"
+
+
+def load_variants(variants_path):
+    if not os.path.isfile(variants_path):
+        return dict()
+    with open(variants_path, 'r') as rf:
+        return json.load(rf)
+
+
+def active_variant(name, variant, variants_path):
+    """
+    模型实际使用的变体
+    Args:
+        name: 模型名称, [ hypo | sentiment ]
+        variant: 配置的变体, auto 表示使用 variants.json 中已激活的变体, 未激活时使用 fp32
+    """
+    if variant != 'auto':
+        return variant
+    return load_variants(variants_path).get(name, {}).get('variant', DEFAULT_VARIANT)
+
+
+def resolve_model_path(path, name, variants_path, variant='auto', logger=None):
+    """
+    返回 (模型文件路径, 变体), 变体文件不存在时退化为 fp32 模型
+    Args:
+        variants_path: 变体激活文件, 见 variants_file
+    """
+    logger = logger or logging.getLogger(__name__)
+    variant = active_variant(name, variant, variants_path)
+    _path = variant_path(path, variant)
+    if variant != DEFAULT_VARIANT and not os.path.isfile(_path):
+        logger.warning(f"[MODEL]: {name} model variant [{variant}] not found: {_path}, fallback to {DEFAULT_VARIANT}")
+        return path, DEFAULT_VARIANT
+    return _path, variant
+
+
+def make_session(path, intra_op_threads=0, inter_op_threads=0):
+    """
+    创建 ONNX 推理会话, 线程数为 0 时使用 onnxruntime 默认值
+    """
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = intra_op_threads
+    options.inter_op_num_threads = inter_op_threads
+    return onnxruntime.InferenceSession(path, options)
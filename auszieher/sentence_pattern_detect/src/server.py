@@ -15,7 +15,14 @@ class Server:
         data_dir = config['DATA_DIR']
         batch_size = config['BATCH_SIZE']
         self.logger = logger
-        self.hypo_model = Model(os.path.join(data_dir, 'hypo'), batch_size = batch_size, logger = self.logger)
+        cascade = config.get('CASCADE', False)
+        token_budget = config.get('TOKEN_BUDGET')
+        variant = config.get('MODEL_VARIANT', 'auto')
+        intra_op_threads = config.get('INTRA_OP_THREADS', 0)
+        inter_op_threads = config.get('INTER_OP_THREADS', 0)
+        self.hypo_model = Model(os.path.join(data_dir, 'hypo'), batch_size = batch_size, logger = self.logger,
+                                cascade = cascade, token_budget = token_budget, variant = variant,
+                                intra_op_threads = intra_op_threads, inter_op_threads = inter_op_threads)
 
     def process(self, text_list, lang):
         self.logger.info(f'text_list:{text_list}, lang:{lang}')
@@ -8,7 +8,8 @@ Version: v1.0
 
 import os
 import time
-import re
+
+from ..commons.splitter import iter_stripped_sentences
 
 
 def split_sentence(document, limit=510):
@@ -19,40 +20,7 @@ def split_sentence(document, limit=510):
         limit: 默认单句最大长度为510个字符
     Returns: Type:list
     """
-    sent_list = []
-    try:
-        document = re.sub('(?P<quotation_mark>([.?!](?![”’"\'])))', 
-                           r'\g<quotation_mark>\n', document)  # 英文单字符断句符
-        document = re.sub('(?P<quotation_mark>([?!.]["\']))', 
-                               r'\g<quotation_mark>\n', document)  # 特殊引号
-
-        sent_list_ori = document.splitlines()
-        for sent in sent_list_ori:
-            sent = sent.strip()
-            if not sent:
-                continue
-            else:
-                while len(sent) > limit:
-                    temp = sent[0:limit]
-                    sent_list.append(temp)
-                    sent = sent[limit:]
-                sent_list.append(sent)
-    except:
-        sent_list.clear()
-        sent_list.append(document)
-
-    merge_list = []
-    sent_list_length = len(sent_list)
-    i = 0
-    while i<sent_list_length:
-        if len(sent_list[i]) <= 4 and i<(sent_list_length-1):
-            merge_list.append(sent_list[i]+sent_list[i+1])
-            i += 2
-        else:
-            merge_list.append(sent_list[i])
-            i += 1
-
-    return merge_list
+    return [text for _, _, text in iter_stripped_sentences(document, flag="en", limit=limit)]
 
 def check_dir(path):
     """
@@ -10,6 +10,7 @@
 #================================================================
 
 import json
+from copy import deepcopy
 
 class Element(object):
     def __init__(self):
@@ -28,6 +29,11 @@ class Element(object):
                 unit_dict[field] = value
         return unit_dict
 
+    def rebase(self, char_offset):
+        if self.index:
+            start, end = self.index.split(',')
+            self.index = f"{int(start)+char_offset},{int(end)+char_offset}"
+
     @property
     def token_span_length(self):
         return (max(self.tokenids)-min(self.tokenids)+1) if self.tokenids else 0
@@ -51,6 +57,7 @@ class ExtractResult(object):
         self.emotion= Element()
         self.object = Element()
         self.reason = Element()
+        self.reason_span = []         # reason 去除前缀标点/空格前的 token id
         self.holder_type = ''
         self.object_type = ''    # aspect 类型：PRON(指示代词) | TACL(指示名词修饰语)
         self.anchor_id = None
@@ -83,6 +90,19 @@ class ExtractResult(object):
                 unit_dict[field] = value
         return unit_dict
 
+    def rebase(self, token_offset, char_offset):
+        r''' 返回偏移平移后的副本, 原结果需以子句内相对偏移(0, 0)生成
+        '''
+        result = deepcopy(self)
+        result.token_offset += token_offset
+        result.char_offset  += char_offset
+        if result.clause_index:
+            start, end = result.clause_index.split(',')
+            result.clause_index = f"{int(start)+char_offset},{int(end)+char_offset}"
+        for ele in [result.holder, result.emotion, result.object, result.reason]:
+            ele.rebase(char_offset)
+        return result
+
     @property
     def prob(self):
         prob = 0.0
@@ -2,7 +2,7 @@
 # coding=utf-8
 #================================================================
 #   Copyright (C) 2022 Fisher. All rights reserved.
-#   
+#
 #   文件名称：coref_parser.py
 #   创 建 者：YuLianghua
 #   创建日期：2022年07月07日
@@ -10,16 +10,123 @@
 #
 #================================================================
 
+import time
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait, FIRST_COMPLETED
+
 from coref_parserSDK import CorefParseClient
 
+from ..utils.logger import logger
+
+
+class CircuitBreaker(object):
+    r''' 熔断器:
+    连续失败 failure_threshold 次后熔断(OPEN), 熔断期间直接跳过调用;
+    recovery_timeout 秒后进入半开状态(HALF_OPEN), 放行一个探测请求, 成功则恢复(CLOSED);
+    '''
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and \
+              time.time()-self.opened_at >= self.recovery_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"[COREF]: circuit breaker open, failures: {self.failures}")
+                self.state = self.OPEN
+                self.opened_at = time.time()
 
 class CorefParser(object):
-    def __init__(self, hosts, timeout=3):
-        self.coref_clinet = CorefParseClient(hosts)
+    r''' 指代消解客户端:
+    1. 多个 hosts(以`,`分隔) 及每个 host 多个 channel 组成连接池, 轮询使用;
+    2. 对冲请求: 请求超过 hedge_delay 未返回或失败时, 向其它 channel 再发一次请求, 取最先成功的结果;
+    3. 熔断: 服务不健康时直接跳过指代消解, 不再等待超时;
+    '''
+    def __init__(self, hosts, timeout=3, max_workers=4, channels_per_host=1, hedge_delay=0.3, \
+                 max_attempts=2, failure_threshold=5, recovery_timeout=30):
+        self.hosts = [host.strip() for host in hosts.split(',') if host.strip()]
+        self.clients = [CorefParseClient(host) for host in self.hosts \
+                            for _ in range(channels_per_host)]
+        self._client_inx = itertools.count()
         self.timeout = timeout
+        self.hedge_delay = hedge_delay
+        self.max_attempts = max_attempts
+        self.breaker = CircuitBreaker(failure_threshold, recovery_timeout)
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.call_pool = ThreadPoolExecutor(max_workers=max_workers*max_attempts)
+
+    def _client(self):
+        return self.clients[next(self._client_inx) % len(self.clients)]
+
+    def _parse(self, client, text):
+        ret = client.parse(text, timeout=self.timeout)
+        # 服务正常返回但无消解结果时视为空结果, 只有 RPC 异常及超时才触发对冲和熔断
+        return ret.result.corefmap if ret.success else {}
+
+    def _hedged_call(self, func, *args):
+        r''' 对冲调用 func(client, *args), 返回最先成功的结果, 全部失败或超时返回 None
+        '''
+        if not self.breaker.allow():
+            logger.warning(f"[COREF]: circuit breaker open, skip coref!!!")
+            return None
+
+        attempts = 1
+        pending = {self.call_pool.submit(func, self._client(), *args)}
+        deadline = time.time() + self.timeout
+        while pending:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            wait_time = min(remaining, self.hedge_delay) if attempts<self.max_attempts else remaining
+            done, pending = wait(pending, timeout=wait_time, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self.breaker.success()
+                    return future.result()
+                logger.warning(f"[COREF]: attempt failed: {future.exception()}")
+
+            # 超过对冲延迟未返回或请求失败时, 向其它 channel 发起请求
+            if attempts < self.max_attempts:
+                pending.add(self.call_pool.submit(func, self._client(), *args))
+                attempts += 1
+
+        self.breaker.failure()
+        return None
 
     def __call__(self, text):
-        ret = self.coref_clinet.parse(text, timeout=self.timeout)
-        if not ret.success:
-            return {}
-        return ret.result.corefmap
+        corefmap = self._hedged_call(self._parse, text)
+        return corefmap if corefmap is not None else {}
+
+    def submit(self, text):
+        r''' 异步调用, 返回 Future, 与本地解析、匹配过程并行
+        '''
+        return self.pool.submit(self, text)
+
+    def batch(self, texts):
+        r''' 批量指代消解, 使用连接池并发请求, 返回与 texts 顺序一致的 corefmap 列表
+        '''
+        return [future.result() for future in [self.submit(text) for text in texts]]
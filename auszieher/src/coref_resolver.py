@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# coding=utf-8
+#================================================================
+#   Copyright (C) 2022 Fisher. All rights reserved.
+#
+#   文件名称：coref_resolver.py
+#   创建日期：2026年10月18日
+#   描    述：本地启发式指代消解: 使用已有的 spacy 解析结果, 将 PRON holder/object
+#             指向前文(可跨子句)最近的兼容名词短语, 替代远程指代消解服务
+#
+#================================================================
+
+from typing import List
+
+from spacy.tokens import Doc
+
+from .phrase_parser import PhraseParser
+from ..utils.logger import logger
+
+
+class CorefUnit(object):
+    def __init__(self, coref_main=''):
+        self.coref_main = coref_main
+
+class HeuristicCorefResolver(object):
+    # 代词对应的先行词约束: 单复数(sing|plur) 及是否为人
+    PRON_CONSTRAINT = {
+        "it"  : ("sing", False),
+        "this": ("sing", False),
+        "these":("plur", False),
+        "they": ("plur", None),
+        "them": ("plur", None),
+        "he"  : ("sing", True),
+        "him" : ("sing", True),
+        "she" : ("sing", True),
+        "her" : ("sing", True),
+    }
+    PERSON_NOUNS = {
+        "person", "man", "woman", "boy", "girl", "guy", "lady", "kid", "child", "baby",
+        "wife", "husband", "son", "daughter", "mother", "father", "mom", "dad", "mum",
+        "brother", "sister", "friend", "boyfriend", "girlfriend", "grandson", "granddaughter",
+        "grandma", "grandpa", "grandmother", "grandfather", "niece", "nephew", "aunt", "uncle",
+        "partner", "spouse", "seller", "customer", "user", "owner", "doctor", "teacher",
+    }
+    PLURAL_TAGS = {"NNS", "NNPS"}
+    MAX_CLAUSE_DISTANCE = 3
+
+    def __init__(self):
+        # 只对 PhraseParser.PRON_CLASS 中人称代词类别(PERSONAL)进行消解;
+        # that 属于关系代词(RELATIVE), 指示代词类别未启用, 均不处理
+        personal = set(PhraseParser.PRON_CLASS["PERSONAL"])
+        self.resolvable = {pron for pron in self.PRON_CONSTRAINT if pron in personal}
+
+    def _compatible(self, chunk, number, is_person):
+        root = chunk.root
+        if root.pos_ not in ("NOUN", "PROPN"):
+            return False
+        chunk_number = "plur" if root.tag_ in self.PLURAL_TAGS else "sing"
+        if number != chunk_number:
+            return False
+        chunk_is_person = root.pos_ == "PROPN" or root.lemma_.lower() in self.PERSON_NOUNS
+        if is_person is True and not chunk_is_person:
+            return False
+        if is_person is False and root.lemma_.lower() in self.PERSON_NOUNS:
+            return False
+        return True
+
+    def resolve(self, docs:List[Doc], clause_inx, token_i):
+        r''' 在当前子句及前 MAX_CLAUSE_DISTANCE 个子句中, 由近及远查找兼容名词短语
+        '''
+        pron = docs[clause_inx][token_i].lower_
+        if pron not in self.resolvable:
+            return None
+        number, is_person = self.PRON_CONSTRAINT[pron]
+
+        for inx in range(clause_inx, max(clause_inx-self.MAX_CLAUSE_DISTANCE-1, -1), -1):
+            doc = docs[inx]
+            if doc is None:
+                continue
+            chunks = [chunk for chunk in doc.noun_chunks \
+                        if inx < clause_inx or chunk.end <= token_i]
+            for chunk in reversed(chunks):
+                if self._compatible(chunk, number, is_person):
+                    return chunk.text
+
+        return None
+
+    def __call__(self, docs:List[Doc], token_ids:List[int], offsets:List[int]=None):
+        r''' 对指定的全局 token id 进行消解
+        Args:
+            docs: 文档所有子句的解析结果, 空子句对应 None
+            token_ids: 待消解代词在文档中的全局 token id
+            offsets: 与 docs 一一对应的子句起始全局 token id, 整篇解析模式下子句之间可能存在
+                     不属于任何子句的 token(如文档开头的空白), 为 None 时按子句长度依次累加
+        Returns:
+            corefmap: {token_id: CorefUnit}
+        '''
+        clause_offsets = []
+        token_offset = 0
+        for inx, doc in enumerate(docs):
+            if doc is None:
+                continue
+            if offsets is not None:
+                token_offset = offsets[inx]
+            clause_offsets.append((inx, token_offset, token_offset+len(doc)))
+            token_offset += len(doc)
+
+        corefmap = dict()
+        for token_id in token_ids:
+            for inx, start, end in clause_offsets:
+                if start <= token_id < end:
+                    coref_main = self.resolve(docs, inx, token_id-start)
+                    corefmap[token_id] = CorefUnit(coref_main or '')
+                    logger.debug(f"[COREF]: local resolve [{docs[inx][token_id-start].text}] -> [{coref_main}]")
+                    break
+
+        return corefmap
@@ -667,6 +667,65 @@ class Extractor(object):
                 
         return qstr
 
+    def fill_text(self, extract_result, doc, char_offset=0):
+        r''' 依据抽取结果的 token id 生成文本及字符偏移相关字段
+        '''
+        holder, emotion = extract_result.holder.tokenids, extract_result.emotion.tokenids
+        fobject, reason = extract_result.object.tokenids, extract_result.reason_span
+        all_match_tokenids = extract_result.all_match_tokenids
+        anchor_id = extract_result.anchor_id
+        _s, _e = all_match_tokenids[0], all_match_tokenids[-1]
+        extract_result.tokens = [ t.text for t in doc[ all_match_tokenids[0]:all_match_tokenids[-1]+1 ] ]
+        # extract_result.clause = ' '.join(extract_result.tokens)
+        extract_result.clause = doc.text
+        # clause_start = char_offset + doc[_s].idx
+        clause_end   = char_offset + doc[_e].idx+len(doc[_e].text)
+        # extract_result.clause_index = f"{clause_start},{clause_end}"
+        extract_result.clause_index = f"{char_offset},{clause_end}"
+        extract_result.anchor_lemma = doc[anchor_id].lemma_
+        extract_result.anchor_text  = doc[anchor_id].text
+
+        # element offset
+        if holder:
+            holder_index_start = char_offset + doc[holder[0]].idx
+            holder_index_end   = char_offset + doc[holder[-1]].idx+len(doc[holder[-1]].text)
+            extract_result.holder.index = f"{holder_index_start},{holder_index_end}"
+        if emotion:
+            emotion_index_start= char_offset + doc[emotion[0]].idx
+            emotion_index_end  = char_offset + doc[emotion[-1]].idx+len(doc[emotion[-1]].text)
+            extract_result.emotion.index= f"{emotion_index_start},{emotion_index_end}"
+        if fobject:
+            object_index_start = char_offset + doc[fobject[0]].idx
+            object_index_end   = char_offset + doc[fobject[-1]].idx + len(doc[fobject[-1]].text)
+            extract_result.object.index = f"{object_index_start},{object_index_end}"
+        if reason:
+            reason_index_start = char_offset + doc[reason[0]].idx
+            reason_index_end   = char_offset + doc[reason[-1]].idx + len(doc[reason[-1]].text)
+            extract_result.reason.index = f"{reason_index_start},{reason_index_end}"
+
+        # extract_result.holder.text = ' '.join([doc[i].lemma_ for i in holder])
+        # extract_result.emotion.text= ' '.join([doc[i].lemma_ for i in emotion])
+        # extract_result.object.text = ' '.join([doc[i].lemma_ for i in fobject])
+        # extract_result.reason.text = ' '.join([doc[i].lemma_ for i in reason])
+        extract_result.holder.text = self._combine_str(holder, doc)
+        extract_result.emotion.text= self._combine_str(emotion, doc)
+        extract_result.object.text = self._combine_str(fobject, doc)
+        extract_result.reason.text = self._combine_str(reason, doc)
+
+        return extract_result
+
+    def refill(self, doc, extract_results, token_offset=0, char_offset=0):
+        r''' 结构缓存命中时, 复用抽取结果的 token id, 依据当前 doc 重新生成文本及偏移
+        '''
+        _results = []
+        for extract_result in extract_results:
+            extract_result = deepcopy(extract_result)
+            extract_result.token_offset = token_offset
+            extract_result.char_offset  = char_offset
+            _results.append(self.fill_text(extract_result, doc, char_offset))
+
+        return _results
+
     @timeit
     def __call__(self, doc, matches, joint_anchor_flag, joint_tuples, 
                  groups: Groups=None, token_offset=0, char_offset=0):
@@ -746,48 +805,13 @@ class Extractor(object):
             anchor_id  = result_anchor_ids[sorted_index[i]]
             extract_result.match_pattern = match_pattern
             extract_result.all_match_tokenids = all_match_tokenids
-            _s, _e = all_match_tokenids[0], all_match_tokenids[-1]
-            extract_result.tokens = [ t.text for t in doc[ all_match_tokenids[0]:all_match_tokenids[-1]+1 ] ]
-            # extract_result.clause = ' '.join(extract_result.tokens)
-            extract_result.clause = doc.text
-            # clause_start = char_offset + doc[_s].idx
-            clause_end   = char_offset + doc[_e].idx+len(doc[_e].text)
-            # extract_result.clause_index = f"{clause_start},{clause_end}"
-            extract_result.clause_index = f"{char_offset},{clause_end}"
             extract_result.anchor_id = anchor_id
-            extract_result.anchor_lemma = doc[anchor_id].lemma_
-            extract_result.anchor_text  = doc[anchor_id].text
             extract_result.holder.tokenids = holder
             extract_result.emotion.tokenids= emotion
             extract_result.object.tokenids = fobject
             extract_result.reason.tokenids = self._remove_prefix_punct_space(reason, doc)
-
-            # element offset
-            if holder:
-                holder_index_start = char_offset + doc[holder[0]].idx
-                holder_index_end   = char_offset + doc[holder[-1]].idx+len(doc[holder[-1]].text)
-                extract_result.holder.index = f"{holder_index_start},{holder_index_end}"
-            if emotion:
-                emotion_index_start= char_offset + doc[emotion[0]].idx
-                emotion_index_end  = char_offset + doc[emotion[-1]].idx+len(doc[emotion[-1]].text)
-                extract_result.emotion.index= f"{emotion_index_start},{emotion_index_end}"
-            if fobject:
-                object_index_start = char_offset + doc[fobject[0]].idx
-                object_index_end   = char_offset + doc[fobject[-1]].idx + len(doc[fobject[-1]].text)
-                extract_result.object.index = f"{object_index_start},{object_index_end}"
-            if reason:
-                reason_index_start = char_offset + doc[reason[0]].idx
-                reason_index_end   = char_offset + doc[reason[-1]].idx + len(doc[reason[-1]].text)
-                extract_result.reason.index = f"{reason_index_start},{reason_index_end}"
-
-            # extract_result.holder.text = ' '.join([doc[i].lemma_ for i in holder])
-            # extract_result.emotion.text= ' '.join([doc[i].lemma_ for i in emotion])
-            # extract_result.object.text = ' '.join([doc[i].lemma_ for i in fobject])
-            # extract_result.reason.text = ' '.join([doc[i].lemma_ for i in reason])
-            extract_result.holder.text = self._combine_str(holder, doc)
-            extract_result.emotion.text= self._combine_str(emotion, doc)
-            extract_result.object.text = self._combine_str(fobject, doc)
-            extract_result.reason.text = self._combine_str(reason, doc)
+            extract_result.reason_span = reason
+            self.fill_text(extract_result, doc, char_offset)
 
             # 处理因为并列关系导致的误召回emotion
             if extract_result.emotion.text and \
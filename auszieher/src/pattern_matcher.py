@@ -101,16 +101,32 @@ class PatternMatcher(object):
     def __init__(self, pattern_map={}, vocab=None):
         self.default_pattern_key2name = dict()
         self.matcher = DependencyMatcher(vocab)
+        # pattern 中使用的字面值(ORTH/TEXT 及 LOWER), 用于计算子句结构签名
+        self.orth_values, self.lower_values = set(), set()
         for pattern_name, pattern in default_patterns.items():
             pattern_key = self.pattern_key(pattern_name)
             self.default_pattern_key2name[pattern_key] = pattern_name
             self.matcher.add(pattern_name, pattern)
+            self._collect_literals(pattern)
 
         for pattern_id, pattern_list in pattern_map.items():
             assert isinstance(pattern_id, int)
             assert isinstance(pattern_list, list)
 
             self.matcher.add(pattern_id, pattern_list)
+            self._collect_literals(pattern_list)
+
+    def _collect_literals(self, pattern_list):
+        for pattern in pattern_list:
+            for item in pattern:
+                for attr, value in item.get("RIGHT_ATTRS", {}).items():
+                    if attr not in ("ORTH", "TEXT", "LOWER"):
+                        continue
+                    values = value.get("IN", []) if isinstance(value, dict) else [value]
+                    if attr == "LOWER":
+                        self.lower_values.update(values)
+                    else:
+                        self.orth_values.update(values)
 
     def pattern_key(self, pattern_name):
         # 如果pattern_name 为 string 类型时，获取pattern_name对应的hashid
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# coding=utf-8
+#================================================================
+#   Copyright (C) 2022 Fisher. All rights reserved.
+#
+#   文件名称：polarity.py
+#   创建日期：2026年10月18日
+#   描    述：词典情感极性: TextBlob(pattern) 情感词典算法的本地实现,
+#             直接按句子文本计算, 不再拼接文本后用 TextBlob 分句
+#
+#================================================================
+
+import re
+
+import numpy as np
+from textblob.en import sentiment as pattern_sentiment
+from textblob._text import PUNCTUATION, ABBREVIATIONS, EMOTICONS, MOOD, IRONY, \
+                           RE_ABBR1, RE_ABBR2, RE_ABBR3, RE_SARCASM, RE_EMOTICONS, replacements
+
+NEGATIONS = ("no", "not", "n't", "never")
+MODIFIERS = ("RB",)
+EOS = "END-OF-SENTENCE"
+SENTENCE_END = ("...", ".", "!", "?", EOS)
+SENTENCE_TAIL = ("'", "\"", "”", "’", "...", ".", "!", "?", ")", EOS)
+QUOTES = ("“", "”", "‘", "’", "'", '"')
+
+
+class LexiconPolarity(object):
+    r''' 与 TextBlob PatternAnalyzer 一致的极性计算:
+    分词规则与 pattern find_tokens 相同; 词典在初始化时由 TextBlob 的英文情感词典(含 JJ->RB 扩展)
+    转为 词->id 映射及极性/主观性/强度数组, 每个词只查一次表
+    '''
+    def __init__(self):
+        if dict.__len__(pattern_sentiment) == 0:
+            pattern_sentiment.load()
+        words = sorted(dict.keys(pattern_sentiment))
+        self.word2id = {w:i for i, w in enumerate(words)}
+        # 字符串输入没有词性, 使用各词性平均后的 None 项: [polarity, subjectivity, intensity]
+        self.scores = np.array([dict.__getitem__(pattern_sentiment, w)[None] for w in words], dtype=np.float64)
+        self.polarity, self.subjectivity, self.intensity = self.scores.T.tolist()
+        self.is_modifier = [any(pos in dict.__getitem__(pattern_sentiment, w) for pos in MODIFIERS) \
+                                for w in words]
+        self.labels = [pattern_sentiment.labeler.get(w) for w in words]
+        # 表情符号, 与 pattern 一致按 EMOTICONS 顺序取第一个匹配
+        self.emoticons = {}
+        for (_, p), emoticons in EMOTICONS.items():
+            for emoticon in emoticons:
+                self.emoticons.setdefault(emoticon.lower(), p)
+        self.replacements = [(re.compile(a), b) for a, b in replacements.items()]
+        self.punctuation = tuple(PUNCTUATION.replace(".", ""))
+
+    def tokenize(self, string):
+        r''' pattern find_tokens 分词, 返回小写词列表
+        '''
+        for a, b in self.replacements:
+            string = a.sub(b, string)
+        for quote in QUOTES:
+            string = string.replace(quote, f" {quote} ")
+        string = re.sub("\r\n", "\n", string)
+        string = re.sub(r"\n{2,}", f" {EOS} ", string)
+
+        tokens = []
+        for t in string.split():
+            tail = []
+            while t.startswith(self.punctuation) and t not in replacements:
+                tokens.append(t[0])
+                t = t[1:]
+            while t.endswith(self.punctuation+(".",)) and t not in replacements:
+                if t.endswith(self.punctuation):
+                    tail.append(t[-1])
+                    t = t[:-1]
+                if t.endswith("..."):
+                    tail.append("...")
+                    t = t[:-3].rstrip(".")
+                if t.endswith("."):
+                    if t in ABBREVIATIONS or RE_ABBR1.match(t) is not None or \
+                        RE_ABBR2.match(t) is not None or RE_ABBR3.match(t) is not None:
+                        break
+                    tail.append(t[-1])
+                    t = t[:-1]
+            if t != "":
+                tokens.append(t)
+            tokens.extend(reversed(tail))
+
+        # 分句只影响 EOS 的去除及句内讽刺/表情符号合并
+        sentences, i, j = [[]], 0, 0
+        while j < len(tokens):
+            if tokens[j] in SENTENCE_END:
+                while j < len(tokens) and tokens[j] in SENTENCE_TAIL:
+                    if tokens[j] in ("'", "\"") and sentences[-1].count(tokens[j]) % 2 == 0:
+                        break
+                    j += 1
+                sentences[-1].extend(t for t in tokens[i:j] if t != EOS)
+                sentences.append([])
+                i = j
+            j += 1
+        sentences[-1].extend(tokens[i:j])
+
+        words = []
+        for sentence in sentences:
+            if not sentence:
+                continue
+            sentence = RE_SARCASM.sub("(!)", " ".join(sentence))
+            sentence = RE_EMOTICONS.sub(lambda m: m.group(1).replace(" ", "") + m.group(2), sentence)
+            words.extend(w.lower() for w in sentence.split())
+        return words
+
+    def assessments(self, words):
+        r''' 与 pattern Sentiment.assessments 相同的修饰词/否定词/感叹号规则
+        Returns:
+            [(words, polarity, subjectivity, label), ...]
+        '''
+        a = []
+        m = None  # 前置修饰词(副词)
+        n = None  # 前置否定词
+        for w in words:
+            inx = self.word2id.get(w)
+            if inx is not None:
+                p, s, i = self.polarity[inx], self.subjectivity[inx], self.intensity[inx]
+                if m is None:
+                    a.append([[w], p, s, i, 1, self.labels[inx]])
+                else:
+                    last = a[-1]
+                    last[0].append(w)
+                    last[1] = max(-1.0, min(p * last[3], +1.0))
+                    last[2] = max(-1.0, min(s * last[3], +1.0))
+                    last[3] = i
+                    last[5] = self.labels[inx]
+                if n is not None:
+                    last = a[-1]
+                    last[0].insert(0, n)
+                    last[3] = 1.0 / last[3]
+                    last[4] = -1
+                m = w if self.is_modifier[inx] else None
+                n = w if w in NEGATIONS else None
+                continue
+
+            if w in NEGATIONS:
+                n = w
+            elif n and len(w.strip("'")) > 1:
+                n = None
+            if n is not None and m is not None and m.endswith("ly"):
+                a[-1][0].append(n)
+                a[-1][4] = -1
+                n = None
+            elif m and len(w) > 2:
+                m = None
+            if w == "!" and len(a) > 0:
+                a[-1][0].append("!")
+                a[-1][1] = max(-1.0, min(a[-1][1] * 1.25, +1.0))
+            if w == "(!)":
+                a.append([[w], 0.0, 1.0, 1.0, 1, IRONY])
+            if w.isalpha() is False and len(w) <= 5 and w not in PUNCTUATION and w in self.emoticons:
+                a.append([[w], self.emoticons[w], 1.0, 1.0, 1, MOOD])
+
+        # "not good" = slightly bad, "not bad" = slightly good
+        return [(w, p * -0.5 if n < 0 else p, s, x) for w, p, s, i, n, x in a]
+
+    def __call__(self, sentence):
+        r''' 返回 (polarity, assessments), 与 TextBlob Sentence 的 sentiment.polarity 及
+        sentiment_assessments.assessments 一致
+        '''
+        assessments = self.assessments(self.tokenize(sentence))
+        # 逐项累加, 与 pattern 的平均值计算顺序一致
+        total = 0
+        for _, p, _, _ in assessments:
+            total += p
+        return total / float(len(assessments) or 1), assessments
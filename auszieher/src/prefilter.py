@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# coding=utf-8
+#================================================================
+#   Copyright (C) 2022 Fisher. All rights reserved.
+#
+#   文件名称：prefilter.py
+#   创建日期：2026年10月18日
+#   描    述：词典预过滤: 在解析前基于原始文本判断子句是否可能出现锚点,
+#             不可能出现锚点的子句跳过句型判断、解析及抽取
+#
+#================================================================
+
+from collections import deque
+
+from ..utils.logger import logger
+
+# 锚点来源(见 TokenParser.extension_ancher_getter 及 Executor._register):
+#   1. lemma/text 在情感词典中; 2. 联合情感词; 3. 否定词的 head(no_adv/not_verb);
+#   4. 依存关系为 ROOT 的介词
+NEGATIONS = ["no", "not", "never", "nor", "neither", "none", "nothing", "nobody", "nowhere",
+             "nope", "nah", "without", "hardly", "barely", "scarcely", "cannot"]
+# 以 't/nt 结尾的缩写, spacy 分词后拆出否定 token
+NEGATION_SUBSTRINGS = ["n't", "n’t"]
+CONTRACTION_AUXES = ["ai", "are", "ca", "could", "did", "does", "do", "had", "has", "have", "is",
+                     "might", "must", "need", "sha", "should", "was", "were", "wo", "would"]
+PREPOSITIONS = ["aboard", "about", "above", "across", "after", "against", "along", "amid", "among",
+                "around", "as", "at", "before", "behind", "below", "beneath", "beside", "besides",
+                "between", "beyond", "but", "by", "concerning", "despite", "down", "during", "except",
+                "for", "from", "in", "inside", "into", "like", "near", "of", "off", "on", "onto",
+                "out", "outside", "over", "past", "per", "plus", "regarding", "round", "since",
+                "than", "through", "throughout", "till", "to", "toward", "towards", "under",
+                "underneath", "unlike", "until", "up", "upon", "versus", "via", "vs", "with",
+                "within", "without"]
+# 缺少 spacy 词形还原表时使用的屈折变化规则 [surface_suffix, lemma_suffix]
+FALLBACK_RULES = [["ies", "y"], ["ied", "y"], ["ier", "y"], ["iest", "y"], ["ily", "y"],
+                  ["ing", "e"], ["ed", "e"], ["es", "e"], ["er", "e"], ["est", "e"]]
+FALLBACK_EXC = {"good": ["better", "best"], "well": ["better", "best"], "bad": ["worse", "worst"],
+                "badly": ["worse", "worst"], "ill": ["worse", "worst"]}
+
+PREFIX, WORD = 1, 2
+_END = None
+
+
+class LexiconPrefilter(object):
+    r''' 基于原始文本的保守预过滤器
+    线索词构建为字符 trie, 只在词首位置(文本开头、空白后、字母数字与其它字符的边界)开始匹配:
+      PREFIX 线索: 情感词典词条及其屈折形式、联合情感词首词、否定词, 作为词首前缀匹配;
+      WORD 线索: 介词、否定缩写, 需完整匹配单词;
+    介词仅在存在可以以 ADP/ROOT 锚点作为 0 号单元的规则时才作为线索;
+    规则中 #ANCHOR# 单元(不要求锚点)的字面 lemma 需与介词同时出现才会通过;
+    Args:
+        nlp: spacy 模型, 用于获取词形还原表
+        dataset: 词典数据
+        pattern_map: 规则解析结果 PatternObject.pattern_map
+        mode: on(跳过不可能匹配的子句) | verify(不跳过, 检查预过滤是否会改变结果)
+        max_samples: verify 模式下保留的违例子句数
+    '''
+    def __init__(self, nlp, dataset, pattern_map, mode="on", max_samples=100):
+        self.mode = mode
+        self.clauses = 0
+        self.skipped = 0
+        self.violations = 0
+        self.samples = deque(maxlen=max_samples)
+
+        rules, exc = self._lemma_tables(nlp)
+        terms = set()
+        for term in dataset.sent_dict:
+            terms.add(term.lower())
+        for joint_word in dataset.joint_sentiment_words:
+            terms.add(joint_word.split()[0].lower())
+
+        self.trie = dict()
+        for term in terms:
+            for form in self._surface_forms(term, rules, exc):
+                self._insert(self.trie, form, PREFIX)
+        for word in NEGATIONS:
+            self._insert(self.trie, word, PREFIX)
+        for aux in CONTRACTION_AUXES:
+            self._insert(self.trie, f"{aux}nt", WORD)
+
+        # ROOT 介词锚点: 只有介词锚点时需要规则 0 号单元可以匹配该介词
+        adp_free, adp_lemmas = self._adp_rules(pattern_map)
+        self.adp_trie = dict()
+        self.adp_lemma_trie = None if adp_free else dict()
+        if adp_free or adp_lemmas:
+            for word in PREPOSITIONS:
+                self._insert(self.adp_trie, word, WORD)
+        if self.adp_lemma_trie is not None:
+            for lemma in adp_lemmas:
+                for form in self._surface_forms(lemma.lower(), rules, exc):
+                    self._insert(self.adp_lemma_trie, form, PREFIX)
+
+    @staticmethod
+    def _lemma_tables(nlp):
+        r''' 获取 spacy 词形还原规则及例外表, 返回 ([[surface_suffix, lemma_suffix], ...], {lemma: [form, ...]})
+        '''
+        rules, exc = [], dict()
+        try:
+            lookups = nlp.get_pipe("lemmatizer").lookups
+            rule_table = lookups.get_table("lemma_rules")
+            exc_table = lookups.get_table("lemma_exc")
+            for pos in ("noun", "verb", "adj", "adv"):
+                rules += [list(rule) for rule in rule_table.get(pos, [])]
+                for form, lemmas in exc_table.get(pos, {}).items():
+                    for lemma in lemmas:
+                        exc.setdefault(lemma.lower(), []).append(form.lower())
+        except Exception as e:
+            logger.warning(f"[PREFILTER]: lemmatizer tables not available, use fallback rules: {e}")
+            rules, exc = [], dict()
+        if not rules:
+            rules = FALLBACK_RULES
+            exc = {lemma:list(forms) for lemma, forms in FALLBACK_EXC.items()}
+
+        return rules, exc
+
+    @staticmethod
+    def _surface_forms(lemma, rules, exc):
+        r''' 可能被还原为 lemma 的表面形式; 只改变后缀的变化(如 loved)由前缀匹配覆盖,
+        这里只需要逆推改变词尾的规则(如 loving, happier)及例外形式(如 better)
+        '''
+        forms = {lemma}
+        for old, new in rules:
+            if new and lemma.endswith(new):
+                forms.add(lemma[:len(lemma)-len(new)] + old)
+        forms.update(exc.get(lemma, []))
+        return [form for form in forms if form]
+
+    @staticmethod
+    def _adp_rules(pattern_map):
+        r''' 分析规则的 0 号单元
+        Returns:
+            adp_free: 是否存在不限制 lemma 的规则可以将 ADP/ROOT 锚点作为 0 号单元,
+                      或不限制 lemma 的 #ANCHOR# 规则
+            adp_lemmas: 其余可能由介词锚点触发的规则 0 号单元 lemma
+        '''
+        def accepts(value, tag):
+            if value is None:
+                return True
+            if isinstance(value, str):
+                return value == tag
+            if "IN" in value and tag not in value["IN"]:
+                return False
+            return tag not in value.get("NOT_IN", [])
+
+        adp_free, adp_lemmas = False, set()
+        for pattern_list in pattern_map.values():
+            for pattern in pattern_list:
+                attrs = [item["RIGHT_ATTRS"] for item in pattern if item["RIGHT_ID"]==0][0]
+                lemma = attrs.get("LEMMA")
+                if "_" in attrs and not (accepts(attrs.get("POS"), "ADP") and \
+                                         accepts(attrs.get("DEP"), "ROOT")):
+                    continue
+                if lemma is None or (isinstance(lemma, dict) and "IN" not in lemma):
+                    adp_free = True
+                else:
+                    adp_lemmas.update([lemma] if isinstance(lemma, str) else lemma["IN"])
+
+        return adp_free, adp_lemmas
+
+    @staticmethod
+    def _insert(trie, word, kind):
+        node = trie
+        for char in word:
+            node = node.setdefault(char, dict())
+        # 同一词条既是前缀线索又是单词线索时按前缀匹配
+        node[_END] = PREFIX if PREFIX in (kind, node.get(_END)) else WORD
+
+    @staticmethod
+    def _search(trie, text):
+        n = len(text)
+        for i in range(n):
+            if i and not text[i-1].isspace() and \
+              (text[i-1].isalnum() or not text[i].isalnum()):
+                continue
+            node, j = trie, i
+            while node is not None:
+                end = node.get(_END)
+                if end == PREFIX or (end == WORD and (j == n or not text[j].isalnum())):
+                    return True
+                if j == n:
+                    break
+                node = node.get(text[j])
+                j += 1
+        return False
+
+    def match(self, text):
+        r''' 子句是否可能出现锚点
+        '''
+        text = text.lower()
+        if any(s in text for s in NEGATION_SUBSTRINGS) or self._search(self.trie, text):
+            return True
+        if not self._search(self.adp_trie, text):
+            return False
+        return self.adp_lemma_trie is None or self._search(self.adp_lemma_trie, text)
+
+    def __call__(self, text):
+        r''' 返回 False 表示子句可以跳过, verify 模式下始终返回 True
+        '''
+        self.clauses += 1
+        if self.match(text):
+            return True
+        self.skipped += 1
+        return self.mode != "on"
+
+    def verify(self, text, results):
+        r''' verify 模式下检查完整流程的结果, 预过滤会跳过但抽取结果非空时记录违例
+        '''
+        if not results or self.match(text):
+            return True
+        self.violations += 1
+        self.samples.append(text)
+        logger.warning(f"[PREFILTER]: clause would be skipped but has {len(results)} results: {text}")
+        return False
+
+    @property
+    def stats(self):
+        return {"mode": self.mode,
+                "clauses": self.clauses,
+                "skipped": self.skipped,
+                "violations": self.violations,
+                "skip_ratio": round(self.skipped/self.clauses, 4) if self.clauses else 0.0}
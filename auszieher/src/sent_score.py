@@ -9,12 +9,14 @@
 #   描    述：计算情感极性值及强度值
 #================================================================
 
+import os
 import random
+import threading
 from typing import List,Dict
+from collections import OrderedDict
 
 # import stanza
 import pickle
-import onnxruntime
 import numpy as np
 from textblob import TextBlob
 from scipy.special import softmax
@@ -23,17 +25,38 @@ from stanza.models.common.vocab import PAD_ID, UNK_ID
 from ..src import dataset
 from ..utils.logger import logger
 from ..utils.utils import timeit
+from ..sentence_pattern_detect.src.model_variant import variants_file, resolve_model_path, make_session
 from .extractor import ExtractResult
 from .phrase_parser import Groups
+from .polarity import LexiconPolarity
 
 SUNK_ID = 250000
+MAX_PHRASE_LEN = 10
+SENTIMENT_MODEL = './data/model/sentiment/stanza_sstplus.onnx'
 
 with open('./data/model/sentiment/vocab_map.pkl', 'rb') as handle:
     vocab_map = pickle.load(handle) 
 with open('./data/model/sentiment/extra_vocab_map.pkl', 'rb') as handle:
     extra_vocab_map = pickle.load(handle) 
 
-def preprocess(inputs, max_window=5, training=False, max_phrase_len=10):
+def word_index(word):
+    if word in vocab_map:
+        return vocab_map[word]
+    new_word = word.replace("-", "")
+    # google vectors have words which are all dashes
+    if len(new_word) == 0:
+        new_word = word
+    if new_word in vocab_map:
+        return vocab_map[new_word]
+
+    if new_word[-1] == "'":
+        new_word = new_word[:-1]
+        if new_word in vocab_map:
+            return vocab_map[new_word]
+
+    return SUNK_ID
+
+def preprocess(inputs, max_window=5, training=False, max_phrase_len=MAX_PHRASE_LEN):
     if max_window > max_phrase_len:
         max_phrase_len = max_window
 
@@ -47,28 +70,8 @@ def preprocess(inputs, max_window=5, training=False, max_phrase_len=10):
         end_pad_width = max_phrase_len - begin_pad_width - len(phrase)
 
         sentence_indices = [PAD_ID] * begin_pad_width
-        sentence_unknowns = []
-
         for word in phrase:
-            if word in vocab_map:
-                sentence_indices.append(vocab_map[word])
-                continue
-            new_word = word.replace("-", "")
-            # google vectors have words which are all dashes
-            if len(new_word) == 0:
-                new_word = word
-            if new_word in vocab_map:
-                sentence_indices.append(vocab_map[new_word])
-                continue
-
-            if new_word[-1] == "'":
-                new_word = new_word[:-1]
-                if new_word in vocab_map:
-                    sentence_indices.append(vocab_map[new_word])
-                    continue
-
-            sentence_unknowns.append(len(sentence_indices))
-            sentence_indices.append(SUNK_ID)
+            sentence_indices.append(word_index(word))
 
         sentence_indices.extend([PAD_ID] * end_pad_width)
         batch_indices.append(sentence_indices)
@@ -90,14 +93,91 @@ def preprocess(inputs, max_window=5, training=False, max_phrase_len=10):
 
     return batch_indices, extra_batch_indices
 
+def fill_indices(inputs, batch_indices, extra_batch_indices):
+    r''' 推理时的 preprocess: 直接写入预分配的 [batch, max_phrase_len] 数组, 不再生成新数组
+    '''
+    batch_indices[:len(inputs)].fill(PAD_ID)
+    extra_batch_indices[:len(inputs)].fill(PAD_ID)
+    max_phrase_len = batch_indices.shape[1]
+    for i, phrase in enumerate(inputs):
+        for j, word in enumerate(phrase[:max_phrase_len]):
+            batch_indices[i, j] = word_index(word)
+            extra_batch_indices[i, j] = extra_vocab_map.get(word, UNK_ID)
+
+ORT_TYPES = {'tensor(float)': np.float32, 'tensor(double)': np.float64,
+             'tensor(int64)': np.int64, 'tensor(int32)': np.int32}
+
+class BoundSession(object):
+    r''' 输入形状固定([batch, max_phrase_len])的 IOBinding 推理:
+    输入输出数组按最大 batch 预分配, 各 batch 大小的绑定首次使用时创建并复用,
+    每次推理只写入前 n 行输入并读取前 n 行输出
+    '''
+    def __init__(self, session, max_batch=32, max_phrase_len=MAX_PHRASE_LEN):
+        self.session = session
+        self.max_batch = max_batch
+        output = session.get_outputs()[0]
+        n_labels = output.shape[-1]
+        if not isinstance(n_labels, int) or output.type not in ORT_TYPES:
+            raise ValueError(f"unsupported output: {output.name} {output.type} {output.shape}")
+        self.output = (output.name, np.zeros((max_batch, n_labels), dtype=ORT_TYPES[output.type]))
+        self.inputs = {}
+        for _input in session.get_inputs():
+            if _input.type not in ORT_TYPES:
+                raise ValueError(f"unsupported input: {_input.name} {_input.type}")
+            self.inputs[_input.name] = np.full((max_batch, max_phrase_len), PAD_ID, dtype=ORT_TYPES[_input.type])
+        if set(self.inputs) != {"batch_indices", "extra_batch_indices"}:
+            raise ValueError(f"unsupported inputs: {list(self.inputs)}")
+        self.bindings = {}
+        self.lock = threading.Lock()
+
+    def _binding(self, n):
+        if n in self.bindings:
+            return self.bindings[n]
+        binding = self.session.io_binding()
+        for name, array in self.inputs.items():
+            binding.bind_input(name, 'cpu', 0, array.dtype.type, [n, array.shape[1]], array.ctypes.data)
+        name, array = self.output
+        binding.bind_output(name, 'cpu', 0, array.dtype.type, [n, array.shape[1]], array.ctypes.data)
+        self.bindings[n] = binding
+        return binding
+
+    def __call__(self, tokens_batch):
+        r''' 返回 [batch, n_labels] 的 logits, 超过 max_batch 时分段推理
+        '''
+        outputs = []
+        with self.lock:
+            for start in range(0, len(tokens_batch), self.max_batch):
+                batch = tokens_batch[start:start+self.max_batch]
+                fill_indices(batch, self.inputs["batch_indices"], self.inputs["extra_batch_indices"])
+                self.session.run_with_iobinding(self._binding(len(batch)))
+                # 输出缓存下次推理会被覆盖, 需复制
+                outputs.append(self.output[1][:len(batch)].copy())
+
+        return np.concatenate(outputs) if len(outputs) > 1 else outputs[0]
+
 class SentScore(object):
-    def __init__(self, nlp, anchor_type_sent={}):
+    def __init__(self, nlp, anchor_type_sent={}, variant='auto', intra_op_threads=0, inter_op_threads=0, \
+                 io_binding=True, max_batch=32, polarity='textblob'):
         # self.nlp = nlp
         # self.stanza_nlp = stanza.Pipeline(lang='en', processors='tokenize,sentiment')
         self.textblob = TextBlob
         self.anchor_type_sent = anchor_type_sent
-        export_onnx_file = "./data/model/sentiment/stanza_sstplus.onnx"
-        self.stanza_sentiment_onnx_session = onnxruntime.InferenceSession(export_onnx_file)
+        # 模型变体: fp32 | int8 | auto(使用 quantize_tool.py 校验后激活的变体)
+        export_onnx_file, self.variant = resolve_model_path(SENTIMENT_MODEL, 'sentiment', \
+                                                            variants_file(os.path.dirname(SENTIMENT_MODEL)), \
+                                                            variant, logger=logger)
+        self.stanza_sentiment_onnx_session = make_session(export_onnx_file, intra_op_threads, inter_op_threads)
+        logger.info(f"sentiment model variant: {self.variant}")
+        # IOBinding 推理: 复用预分配的输入输出数组, 模型输出形状不固定时退化为 session.run
+        self.bound_session = None
+        if io_binding:
+            try:
+                self.bound_session = BoundSession(self.stanza_sentiment_onnx_session, max_batch=max_batch)
+            except Exception as e:
+                logger.warning(f"sentiment model io binding disabled: {e}")
+        # 词典极性: textblob(拼接后由 TextBlob 分句计算) | lexicon(本地实现, 按每个结果的句子文本直接计算)
+        self.polarity = polarity
+        self.lexicon_polarity = LexiconPolarity() if polarity == 'lexicon' else None
 
     def _stanza_model_score(self, text):
         doc = self.stanza_nlp(text)
@@ -147,10 +227,13 @@ class SentScore(object):
         if not tokens_batch:
             return result
 
-        batch_indices, extra_batch_indices = preprocess(tokens_batch)
-        outputs = self.stanza_sentiment_onnx_session.run(None,
-            { "batch_indices":batch_indices, 
-              "extra_batch_indices":extra_batch_indices})[0] 
+        if self.bound_session is not None:
+            outputs = self.bound_session(tokens_batch)
+        else:
+            batch_indices, extra_batch_indices = preprocess(tokens_batch)
+            outputs = self.stanza_sentiment_onnx_session.run(None,
+                { "batch_indices":batch_indices, 
+                  "extra_batch_indices":extra_batch_indices})[0] 
         prob_dists = softmax(outputs, axis=1)
         labels= np.argmax(outputs, axis=1)
         for i, prob_dist in enumerate(prob_dists):
@@ -178,6 +261,59 @@ class SentScore(object):
         
         return result
 
+    def _textblob_batch_score(self, extract_results_batch):
+        r''' 多个子句的 TextBlob 打分, 与逐子句调用 _textblob_model_score 结果一致:
+        逐子句拼接时第 k 个结果对应第 k 个句子, 除最后一个外均以 !!! 结尾(! 会增强极性), 按此还原每个结果的句子文本;
+        去重后的文本以 !!! 拼接一次分句, 校验每个文本恰好为一个句子后按句子文本去重计算,
+        文本内部含句子边界时分句不一致, 退化为逐子句计算
+        '''
+        texts_batch = [[extract_result.clause.replace('.', ' ') for extract_result in extract_results] \
+                            for extract_results in extract_results_batch]
+        uniques = list(OrderedDict.fromkeys(text for texts in texts_batch for text in texts))
+        textblob_result = self.textblob('!!! '.join(uniques) + '!!!')
+        sentences = [sentence.raw.strip() for sentence in textblob_result.sentences]
+        if sentences != [(text + '!!!').strip() for text in uniques]:
+            logger.info(f"textblob batch split mismatch, sentences:[{len(sentences)}] texts:[{len(uniques)}]")
+            return [self._textblob_model_score(self._gen_text_batch(extract_results), len(extract_results)) \
+                        for extract_results in extract_results_batch]
+
+        def analyze(sentence):
+            sentiment = textblob_result.analyzer.analyze(sentence, keep_assessments=True)
+            return sentiment.polarity, sentiment.assessments
+
+        return self._score_sentences(texts_batch, analyze)
+
+    def _lexicon_batch_score(self, extract_results_batch):
+        r''' 本地词典极性打分, 不拼接、不分句, 句子文本与逐子句 TextBlob 拼接时一致
+        '''
+        texts_batch = [[extract_result.clause.replace('.', ' ') for extract_result in extract_results] \
+                            for extract_results in extract_results_batch]
+        return self._score_sentences(texts_batch, self.lexicon_polarity)
+
+    def _polarity_batch_score(self, extract_results_batch):
+        if self.lexicon_polarity is not None:
+            return self._lexicon_batch_score(extract_results_batch)
+        return self._textblob_batch_score(extract_results_batch)
+
+    @staticmethod
+    def _score_sentences(texts_batch, analyze):
+        r''' 按子句内位置还原每个结果的句子文本(除最后一个外以 !!! 结尾), 相同句子只计算一次
+        Args:
+            analyze: 句子文本 -> (polarity, assessments)
+        '''
+        sentence2score = {}
+        result = []
+        for texts in texts_batch:
+            _result = []
+            for k, text in enumerate(texts):
+                sentence = (text + '!!!' if k < len(texts)-1 else text).strip()
+                if sentence not in sentence2score:
+                    sentence2score[sentence] = analyze(sentence)
+                _result.append(sentence2score[sentence])
+            result.append(_result)
+
+        return result
+
     @timeit
     def _score(self, doc, extract_results:List[ExtractResult], anchor_type:str, joint_anchor_sent):
         r''' 计算情感得分
@@ -185,9 +321,19 @@ class SentScore(object):
         comment_tokens_batch = self._gen_token_batch(doc, extract_results)
         stanza_sent_batch_result = self._stanza_model_onnx_score(comment_tokens_batch)
 
-        comment_text_batch = self._gen_text_batch(extract_results)
-        textblob_sent_batch_result=self._textblob_model_score(comment_text_batch, len(extract_results))
+        if self.lexicon_polarity is not None:
+            textblob_sent_batch_result = self._lexicon_batch_score([extract_results])[0]
+        else:
+            comment_text_batch = self._gen_text_batch(extract_results)
+            textblob_sent_batch_result=self._textblob_model_score(comment_text_batch, len(extract_results))
+
+        self._combine(extract_results, anchor_type, joint_anchor_sent, \
+                      stanza_sent_batch_result, textblob_sent_batch_result)
 
+    def _combine(self, extract_results:List[ExtractResult], anchor_type:str, joint_anchor_sent, \
+                 stanza_sent_batch_result, textblob_sent_batch_result):
+        r''' 由 stanza 及 TextBlob 结果计算情感得分
+        '''
         for inx, extract_result in enumerate(extract_results):
             anchor_sent = dataset.sent_score(extract_result.anchor_lemma) or \
                                 dataset.sent_score(extract_result.anchor_text)
@@ -291,3 +437,28 @@ class SentScore(object):
     def __call__(self, doc, groups:Groups, extract_results: List[ExtractResult], joint_anchor_sent, anchor_type="common"):
         self._score(doc, extract_results, anchor_type, joint_anchor_sent)
         self._intensity(extract_results, groups.degree_head_dict)
+
+    @timeit
+    def batch(self, jobs):
+        r''' 多个子句批量打分, 结果与逐子句调用 __call__ 一致:
+        所有子句的 token 一次送入 stanza 模型(各行独立计算), TextBlob 文本去重后一次分句
+        Args:
+            jobs: [(doc, groups, extract_results, joint_anchor_sent, anchor_type), ...]
+        '''
+        jobs = [job for job in jobs if job[2]]
+        if not jobs:
+            return
+
+        comment_tokens_batch = []
+        for doc, _, extract_results, _, _ in jobs:
+            comment_tokens_batch += self._gen_token_batch(doc, extract_results)
+        stanza_sent_batch_result = self._stanza_model_onnx_score(comment_tokens_batch)
+        textblob_sent_batch_results = self._polarity_batch_score([job[2] for job in jobs])
+
+        inx = 0
+        for (doc, groups, extract_results, joint_anchor_sent, anchor_type), textblob_sent_batch_result in \
+                zip(jobs, textblob_sent_batch_results):
+            self._combine(extract_results, anchor_type, joint_anchor_sent, \
+                          stanza_sent_batch_result[inx:inx+len(extract_results)], textblob_sent_batch_result)
+            self._intensity(extract_results, groups.degree_head_dict)
+            inx += len(extract_results)
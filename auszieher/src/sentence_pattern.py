@@ -10,8 +10,10 @@
 #
 #================================================================
 
-from typing import List
+import os
+from typing import Any, Dict, List
 from abc import abstractmethod
+from collections import OrderedDict
 import numpy as np
 import xgboost as xgb
 from spacy.tokens import Doc
@@ -20,6 +22,7 @@ from auszieher.sentence_pattern_detect.src.server import Server as HypoServer
 
 from ..utils.logger import logger
 from ..utils.utils import timeit
+from ..utils.cache import LRUCache, version_stamp
 
 
 QUESTION_WORDS2ID = {
@@ -43,7 +46,8 @@ class Model(object):
         raise NotImplemented
     
     def predict(self, input):
-        prob = self.xgb_model.predict(input)
+        # 直接对 numpy 特征矩阵进行预测, 避免构建 DMatrix
+        prob = self.xgb_model.inplace_predict(input)
         return prob
 
     def __call__(self, input):
@@ -128,53 +132,137 @@ class Interrogative(Model):
             data.append([is_question_mark, is_question_word, dist, word_id, \
                 qw_bw_pos, is_aux, aux_dist, aux_qw_dist, has_reverse, reverse_dist])
 
-            data = np.array(data)
+        data = np.array(data, dtype=np.float32).reshape(-1, 10)
 
-            return xgb.DMatrix(data)
+        return data
 
 class HypoSentence(object):
-    def __init__(self):
+    def __init__(self, cache_size=10000):
         self.hypothetical_model = HypoServer(logger=logger)
+        # 判断结果缓存: key 为 (模型版本, 子句文本), value 为 (label, prob);
+        # 模型输入为子句原文, 与解析模式无关
+        hypo_model = self.hypothetical_model.hypo_model
+        self.version = version_stamp([os.path.join(hypo_model.data_dir, '**', '*.csv')], \
+                                     stat_patterns=[os.path.join(hypo_model.data_dir, '**', '*')], \
+                                     extra=[hypo_model.cascade, sorted(hypo_model.lang2variant.items())])
+        self.cache = LRUCache(cache_size) if cache_size>0 else None
 
     @timeit
     def __call__(self, texts:List[str]):
-        # hypothetical check
+        # hypothetical check, 命中缓存及重复的子句不再送入模型
+        if not texts:
+            return []
+
+        verdicts = dict()
+        if self.cache is not None:
+            for text in set(texts):
+                verdict = self.cache.get((self.version, text))
+                if verdict is not None:
+                    verdicts[text] = verdict
+        misses = list(OrderedDict.fromkeys(text for text in texts if text not in verdicts))
+        if misses:
+            results = self.hypothetical_model.process(misses, lang='en')
+            for text, (label, prob) in zip(misses, results):
+                verdicts[text] = (str(label)=='1', prob)
+                if self.cache is not None:
+                    self.cache.put((self.version, text), verdicts[text])
+
         hypots = []
-        results = self.hypothetical_model.process(texts, lang='en')
-        for i,(label, prob) in enumerate(results):
-            if str(label)=='1': 
-                logger.info(f"[{texts[i]}] is HYPOTHETICAL sentence pattern, prob: {round(prob,3)} !!!")
-                hypots.append(True)
-            else:
-                hypots.append(False)
+        for text in texts:
+            label, prob = verdicts[text]
+            if label:
+                logger.info(f"[{text}] is HYPOTHETICAL sentence pattern, prob: {round(prob,3)} !!!")
+            hypots.append(label)
 
         return hypots
 
+    @timeit
+    def batch(self, texts_map:Dict[Any, List[str]]):
+        r''' 跨文档批量判断, 所有文档的子句合并后一次送入模型, 以获得完整的batch
+        Args:
+            texts_map: {key: [clause_text, ...]}
+        Returns:
+            OrderedDict: {key: [bool, ...]}, key 顺序与 texts_map 一致
+        '''
+        texts = []
+        for _texts in texts_map.values():
+            texts.extend(_texts)
+        hypots = self(texts)
+
+        start = 0
+        results = OrderedDict()
+        for key, _texts in texts_map.items():
+            results[key] = hypots[start:start+len(_texts)]
+            start += len(_texts)
+
+        return results
+
 class InteSentence(object):
-    def __init__(self, config):
+    def __init__(self, config, cache_size=10000):
         self.interrogative_model= Interrogative(config)
+        # 判断结果缓存: key 为 (模型版本, 解析模式, 子句文本), value 为 (label, prob);
+        # 特征来自解析结果, 整篇解析与按子句解析的词性标注可能不同, 按解析模式区分
+        self.version = version_stamp([], stat_patterns=[config['interrogative']], \
+                                     extra=[self.interrogative_model.threshold])
+        self.cache = LRUCache(cache_size) if cache_size>0 else None
+
+    def verdict(self, doc, prob):
+        end = len(doc)-1
+        while end>0:
+            if doc[end].lemma_ == ' ':
+                end -= 1
+                continue
+            else:break
+        last_char = doc[end].lemma_
+        logger.info(f"[{doc.text}] interrogative prob: {prob}")
+        if prob > self.interrogative_model.threshold:
+            logger.info(f"[{doc.text}] is INTERROGATIVE sentence pattern, prob: {round(prob,3)} !!!")
+            return True
+        elif prob>0.55 and last_char=="?":
+            logger.info(f"[{doc.text}] is INTERROGATIVE sentence pattern, prob: {round(prob,3)} + '?' !!!")
+            return True
+        return False
 
     @timeit
-    def __call__(self, docs:List[Doc]):
-        # interrogative check
-        inters = []
-        probs = self.interrogative_model(docs)
-        for i,prob in enumerate(probs):
-            end = len(docs[i])-1
-            while end>0:
-                if docs[i][end].lemma_ == ' ':
-                    end -= 1
-                    continue
-                else:break
-            last_char = docs[i][end].lemma_
-            logger.info(f"[{docs[i].text}] interrogative prob: {prob}")
-            if prob > self.interrogative_model.threshold:
-                logger.info(f"[{docs[i].text}] is INTERROGATIVE sentence pattern, prob: {round(prob,3)} !!!")
-                inters.append(True)
-            elif prob>0.55 and last_char=="?":
-                logger.info(f"[{docs[i].text}] is INTERROGATIVE sentence pattern, prob: {round(prob,3)} + '?' !!!")
-                inters.append(True)
-            else:
-                inters.append(False)
-        
-        return inters
+    def __call__(self, docs:List[Doc], parse_mode:str="clause"):
+        # interrogative check, 命中缓存及重复的子句不再预测
+        if not docs:
+            return []
+
+        verdicts = dict()
+        if self.cache is not None:
+            for text in set(doc.text for doc in docs):
+                verdict = self.cache.get((self.version, parse_mode, text))
+                if verdict is not None:
+                    verdicts[text] = verdict
+        misses = list(OrderedDict((doc.text, doc) for doc in docs if doc.text not in verdicts).values())
+        if misses:
+            probs = self.interrogative_model(misses)
+            for doc, prob in zip(misses, probs):
+                verdicts[doc.text] = (self.verdict(doc, prob), float(prob))
+                if self.cache is not None:
+                    self.cache.put((self.version, parse_mode, doc.text), verdicts[doc.text])
+
+        return [verdicts[doc.text][0] for doc in docs]
+
+    @timeit
+    def batch(self, docs_map:Dict[Any, List[Doc]], parse_mode:str="clause"):
+        r''' 跨文档批量判断, 所有子句特征合并为一个矩阵后一次预测
+        Args:
+            docs_map: {key: [doc, ...]}
+            parse_mode: 解析模式, [ clause | document ], 作为缓存 key 的一部分
+        Returns:
+            OrderedDict: {key: [bool, ...]}, key 顺序与 docs_map 一致
+        '''
+        docs = []
+        for _docs in docs_map.values():
+            docs.extend(_docs)
+        inters = self(docs, parse_mode=parse_mode)
+
+        start = 0
+        results = OrderedDict()
+        for key, _docs in docs_map.items():
+            results[key] = inters[start:start+len(_docs)]
+            start += len(_docs)
+
+        return results
@@ -195,6 +195,37 @@ class TokenParser(Register):
         
         return doc
 
+    @timeit
+    def parse_document(self, text, starts):
+        r'''
+        整篇文档一次解析, starts 中的字符位置作为预设句子边界, 其余位置不允许断句;
+        starts 必须与 token 起始位置对齐
+        '''
+        doc = self.nlp.make_doc(text)
+        starts = set(starts)
+        for token in doc[1:]:
+            token.is_sent_start = token.idx in starts
+        for name, proc in self.nlp.pipeline:
+            if name == 'ner':
+                continue
+            doc = proc(doc)
+
+        for token in doc:
+            token._.anchor = self.extension_ancher_getter(token)
+
+        return doc
+
+    def pipe(self, texts, batch_size=256, n_process=1):
+        r'''
+        批量解析文本, 结果顺序与 texts 一致;
+        '''
+        docs = self.nlp.pipe(texts, disable=['ner'], batch_size=batch_size, n_process=n_process)
+        for doc in docs:
+            for token in doc:
+                token._.anchor = self.extension_ancher_getter(token)
+
+            yield doc
+
 if __name__ == "__main__":
     token_parser = TokenParser()
     doc = token_parser("it can not walk")
@@ -1,2 +1,3 @@
-from .utils import split_sentence
+from .splitter import split_sentence
+from .splitter import iter_sentences
 from .utils import text_norm
\ No newline at end of file
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# coding=utf-8
+#================================================================
+#   Copyright (C) 2022 Fisher. All rights reserved.
+#
+#   文件名称：batcher.py
+#   创建日期：2026年10月18日
+#   描    述：自适应微批处理: 合并并发请求批量抽取, 再将结果分发给各请求
+#
+#================================================================
+
+import asyncio
+from collections import deque
+
+from .splitter import iter_sentences
+from .logger import logger
+
+
+def count_clauses(text):
+    return max(sum(1 for _ in iter_sentences(text)), 1)
+
+
+class MicroBatcher(object):
+    r''' 自适应微批处理
+    1. 无在途批次时请求立即处理, 低负载下延迟与非批处理一致;
+    2. 部分 worker 忙碌时, 等待窗口随在途批次数增长(最长 max_wait_ms);
+    3. 所有 worker 忙碌时请求排队, 任一批次完成后立即合并排队请求;
+    4. 单批子句数不超过 max_clauses;
+    Args:
+        handler: async callable, texts -> outputs (顺序与 texts 一致)
+        max_wait_ms: 最长等待窗口
+        max_clauses: 单批最大子句数
+        workers: 后端并行处理数(进程池大小)
+    '''
+    def __init__(self, handler, max_wait_ms=5, max_clauses=64, workers=1):
+        self.handler = handler
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_clauses = max_clauses
+        self.workers = workers
+        self.queue = deque()       # [(text, clause_num, future)]
+        self.queue_clauses = 0
+        self.inflight = 0
+        self._timer = None
+
+    async def submit(self, text):
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        # 分句为 CPU 计算, 放到线程池中执行, 避免长文本阻塞事件循环上的其他请求
+        clause_num = await loop.run_in_executor(None, count_clauses, text)
+        self.queue.append((text, clause_num, future))
+        self.queue_clauses += clause_num
+        self._schedule(loop)
+
+        return await future
+
+    @property
+    def window(self):
+        return self.max_wait * min(self.inflight / self.workers, 1.0)
+
+    def _schedule(self, loop):
+        if not self.queue:
+            return
+        if self.inflight == 0 or self.queue_clauses >= self.max_clauses:
+            self._flush(loop)
+        elif self.inflight >= self.workers:
+            # 等待在途批次完成后再处理
+            return
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush, loop)
+
+    def _flush(self, loop):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self.queue and self.inflight < self.workers:
+            batch, clauses = [], 0
+            while self.queue and \
+              (not batch or clauses+self.queue[0][1] <= self.max_clauses):
+                text, clause_num, future = self.queue.popleft()
+                batch.append((text, future))
+                clauses += clause_num
+            self.queue_clauses -= clauses
+            self.inflight += 1
+            logger.debug(f"[BATCHER]: flush batch size: {len(batch)}, clauses: {clauses}, "
+                         f"inflight: {self.inflight}, queue: {len(self.queue)}")
+            loop.create_task(self._run(batch, loop))
+
+            # 队列剩余不足一批时继续等待合并
+            if self.queue_clauses < self.max_clauses:
+                break
+
+        if self.queue and self.inflight < self.workers and self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush, loop)
+
+    async def _run(self, batch, loop):
+        texts = [text for text, _ in batch]
+        try:
+            outputs = await self.handler(texts)
+            for (_, future), output in zip(batch, outputs):
+                if not future.done():
+                    future.set_result(output)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self.inflight -= 1
+            if self.queue:
+                self._flush(loop)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# coding=utf-8
+#================================================================
+#   Copyright (C) 2022 Fisher. All rights reserved.
+#
+#   文件名称：cache.py
+#   创建日期：2026年10月18日
+#   描    述：子句级结果缓存
+#
+#================================================================
+
+import os
+import glob
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def version_stamp(patterns, stat_patterns=(), extra=()):
+    r''' 规则、词典及模型的版本戳, 任一依赖变更后缓存自动失效
+    Args:
+        patterns: 按文件内容计算的文件路径或 glob 模式列表(规则、词典)
+        stat_patterns: 按文件大小及修改时间计算的 glob 模式列表(模型等大文件)
+        extra: 其它版本信息, 如 spacy 模型版本
+    '''
+    md5 = hashlib.md5()
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern, recursive=True)):
+            if not os.path.isfile(path):
+                continue
+            md5.update(path.encode('utf-8'))
+            with open(path, 'rb') as rf:
+                md5.update(rf.read())
+    for pattern in stat_patterns:
+        for path in sorted(glob.glob(pattern, recursive=True)):
+            if not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            md5.update(f"{path}\t{stat.st_size}\t{int(stat.st_mtime)}".encode('utf-8'))
+    for item in extra:
+        md5.update(str(item).encode('utf-8'))
+
+    return md5.hexdigest()[:12]
+
+class LRUCache(object):
+    r''' 容量有限的 LRU 缓存, 记录命中/未命中/淘汰次数用于容量评估
+    '''
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key not in self.data:
+                self.misses += 1
+                return default
+            self.data.move_to_end(key)
+            self.hits += 1
+            return self.data[key]
+
+    def put(self, key, value):
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key):
+        return key in self.data
+
+    @property
+    def stats(self):
+        total = self.hits + self.misses
+        return {"size": len(self.data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits/total, 4) if total else 0.0}
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# coding=utf-8
+#================================================================
+#   Copyright (C) 2022 Fisher. All rights reserved.
+#
+#   文件名称：disk_cache.py
+#   创建日期：2026年10月18日
+#   描    述：持久化子句缓存: SQLite(WAL 模式)存储序列化的子句抽取结果,
+#             多个 worker 进程可并发读写, 用于规则/词典调整后的重复离线处理
+#
+#================================================================
+
+import os
+import time
+import pickle
+import sqlite3
+import hashlib
+
+from .logger import logger
+
+
+class DiskCache(object):
+    r''' 持久化子句缓存
+    key 为 sha1(版本戳 + 子句文本), 版本戳由规则、词典及模型版本计算,
+    依赖变更后旧版本数据不会再命中, 可通过 cache_tool.py 清理
+    Args:
+        path: sqlite 文件路径
+        version: 版本戳
+        timeout: 写锁等待时间(s)
+    '''
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS clause_cache (
+            key     TEXT PRIMARY KEY,
+            version TEXT NOT NULL,
+            value   BLOB NOT NULL,
+            ctime   INTEGER NOT NULL
+        )'''
+    MAX_VARIABLES = 500
+
+    def __init__(self, path, version, timeout=30):
+        self.path = path
+        self.version = version
+        self.timeout = timeout
+        self.pending = []
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self._conn = None
+        self._pid = None
+
+    @property
+    def conn(self):
+        # 连接不能跨进程共享, fork 后在子进程中重新连接
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = self.connect(self.path, self.timeout)
+            self._pid = os.getpid()
+        return self._conn
+
+    @classmethod
+    def connect(cls, path, timeout=30):
+        conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(cls.SCHEMA)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_version ON clause_cache(version)")
+        return conn
+
+    def set_version(self, version):
+        self.flush()
+        self.version = version
+
+    def key(self, text):
+        return hashlib.sha1(f"{self.version}\t{text}".encode('utf-8')).hexdigest()
+
+    def get_many(self, texts):
+        r''' 批量查询
+        Returns:
+            {text: value}, 只包含命中的子句
+        '''
+        keys = {self.key(text):text for text in set(texts)}
+        results = dict()
+        key_list = list(keys)
+        try:
+            for i in range(0, len(key_list), self.MAX_VARIABLES):
+                _keys = key_list[i:i+self.MAX_VARIABLES]
+                rows = self.conn.execute(
+                    f"SELECT key, value FROM clause_cache WHERE key IN ({','.join('?'*len(_keys))})",
+                    _keys).fetchall()
+                for key, value in rows:
+                    results[keys[key]] = pickle.loads(value)
+        except Exception as e:
+            # 缓存不可用时不影响抽取
+            logger.warning(f"[CACHE]: disk cache read failed: {e}")
+        self.hits += len(results)
+        self.misses += len(keys)-len(results)
+
+        return results
+
+    def put(self, text, value):
+        r''' 写入缓冲区, 由 flush 批量提交
+        '''
+        self.pending.append((self.key(text), self.version,
+                             pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), int(time.time())))
+
+    def flush(self):
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, []
+        try:
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                self.conn.executemany("INSERT OR REPLACE INTO clause_cache VALUES (?, ?, ?, ?)", pending)
+            self.writes += len(pending)
+        except Exception as e:
+            logger.warning(f"[CACHE]: disk cache write failed: {e}")
+
+    @property
+    def stats(self):
+        total = self.hits + self.misses
+        return {"path": self.path,
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "hit_ratio": round(self.hits/total, 4) if total else 0.0}
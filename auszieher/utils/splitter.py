@@ -0,0 +1,18 @@
+#!/usr/bin/env python
+# coding=utf-8
+#================================================================
+#   Copyright (C) 2022 Fisher. All rights reserved.
+#
+#   文件名称：splitter.py
+#   创建日期：2026年10月18日
+#   描    述：流式分句: 单次扫描文档, 逐个返回子句在原文中的位置及子句文本;
+#             实现位于 sentence_pattern_detect.src.commons.splitter, 与其共用
+#
+#================================================================
+
+from typing import List
+
+from ..sentence_pattern_detect.src.commons.splitter import PUNCT_SET, iter_sentences
+
+def split_sentence(document: str, flag: str = "all", limit: int = 10000) -> List[str]:
+    return [text for _, _, text in iter_sentences(document, flag=flag, limit=limit)]
@@ -22,13 +22,10 @@ from treelib import Tree
 
 from tytextnorm import TextNorm
 
+from .splitter import PUNCT_SET
+from .splitter import split_sentence
 
-_punct = (
-    r"… …… , : . ; ! ? ¿ ؟ ¡ ( ) [ ] { } < > _ # * & 。 ？ ！ ， 、 ； ： ～ · । ، ۔ ؛ ٪"
-)
-split_chars = lambda char: list(char.strip().split(" "))
 
-PUNCT_SET = set(split_chars(_punct))
 TIMEIT_ENV = True if 'TIMEIT' in os.environ else False
 
 textnorm  = TextNorm(lemma=False)
@@ -135,77 +132,6 @@ class DocTree(object):
         for tree in trees:
             tree.show()
 
-def split_sentence(document: str, flag: str = "all", limit: int = 10000) -> List[str]:
-    """
-    Args:
-        document:
-        flag: Type:str, "all" 中英文标点分句，"zh" 中文标点分句，"en" 英文标点分句
-        limit: 默认单句最大长度为510个字符
-    Returns: Type:list
-    """
-    sent_list = []
-    try:
-        if flag == "zh":
-            document = re.sub('(?P<quotation_mark>([。？！…](?![”’"\'])))',
-                               r'\g<quotation_mark>\n', document)  # 单字符断句符
-            document = re.sub('(?P<quotation_mark>([。？！]|…{1,2})[”’"\'])',
-                               r'\g<quotation_mark>\n', document)  # 特殊引号
-        elif flag == "en":
-            document = re.sub('(?P<quotation_mark>([.?!](?![”’"\'])))',
-                               r'\g<quotation_mark>\n', document)  # 英文单字符断句符
-            document = re.sub('(?P<quotation_mark>([?!.]["\']))',
-                               r'\g<quotation_mark>\n', document)  # 特殊引号
-        else:
-            document = re.sub('(?P<quotation_mark>([。？！….?!](?![”’"\'])))',
-                               r'\g<quotation_mark>\n', document)  # 单字符断句符
-            document = re.sub('(?P<quotation_mark>(([。？！.!?]|…{1,2})[”’"\']))',
-                               r'\g<quotation_mark>\n', document)  # 特殊引号
-
-        sent_list_ori = document.splitlines()
-        for sent in sent_list_ori:
-            if not sent:
-                continue
-            else:
-                while len(sent) > limit:
-                    temp = sent[0:limit]
-                    sent_list.append(temp)
-                    sent = sent[limit:]
-                sent_list.append(sent)
-    except:
-        sent_list.clear()
-        sent_list.append(document)
-
-    if len(sent_list)<=1:
-        return sent_list
-
-    merge_list = [sent_list[0]]
-    sent_list_length = len(sent_list)
-    i = 1
-    while i<sent_list_length:
-        j = 0
-        while j < len(sent_list[i]):
-            if sent_list[i][j] in PUNCT_SET:
-                merge_list[-1] += sent_list[i][j]
-                j += 1
-            else:
-                break
-
-        if j!=0:
-            if not sent_list[i][j:]:
-                i += 1
-                continue
-            sent_list[i] = sent_list[i][j:]
-
-        if len(sent_list[i]) <= 4 and i<(sent_list_length-1):
-            merge_list.append(sent_list[i]+sent_list[i+1])
-            i += 2
-        else:
-            if sent_list[i]:
-                merge_list.append(sent_list[i])
-            i += 1
-
-    return merge_list
-
 def graph_root2leaf_paths(graph, root):
     history_set = set()
     results = []
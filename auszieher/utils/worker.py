@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# coding=utf-8
+#================================================================
+#   Copyright (C) 2022 Fisher. All rights reserved.
+#
+#   文件名称：worker.py
+#   创建日期：2026年10月18日
+#   描    述：多进程 worker: 每个进程持有独立的 Executor 实例
+#
+#================================================================
+
+import os
+import time
+import threading
+import traceback
+
+from .logger import logger
+
+_executor = None
+STATS_INTERVAL = 1.0
+
+def init_executor(config, stats_board=None):
+    r''' 进程池 initializer, 在 worker 进程中初始化 Executor
+    Args:
+        stats_board: 主进程共享的统计表(multiprocessing.Manager().dict()), 不为 None 时
+                     后台线程每 STATS_INTERVAL 秒按 pid 写入本进程统计信息
+    '''
+    global _executor
+    from .. import Executor
+    _executor = Executor(config=config)
+    if stats_board is not None:
+        report_stats(stats_board)
+        threading.Thread(target=_report_loop, args=(stats_board,), daemon=True).start()
+    logger.info("worker executor initialized...")
+
+def extract(text, coref=False):
+    r''' 单条抽取, 返回 (success, results|mesg)
+    '''
+    try:
+        results = _executor.extract(text, coref=coref)
+    except Exception:
+        mesg = traceback.format_exc()
+        logger.error(f"extract failed: {mesg}")
+        return False, mesg
+
+    return True, [r.to_dict() for r in results]
+
+def extract_batch(texts, coref=False, batch_size=256):
+    r''' 批量抽取, 返回与 texts 顺序一致的 [(success, results|mesg), ...]
+    '''
+    outputs = []
+    for results in _executor.extract_batch(texts, batch_size=batch_size, coref=coref):
+        if isinstance(results, Exception):
+            outputs.append((False, repr(results)))
+        else:
+            outputs.append((True, [r.to_dict() for r in results]))
+
+    return outputs
+
+def stats():
+    r''' worker 进程内缓存等统计信息
+    '''
+    return {"pid": os.getpid(), "clause_cache": _executor.cache_stats(), \
+            "prefilter": _executor.prefilter_stats(), "updated_at": time.time()}
+
+def report_stats(stats_board):
+    r''' 将本进程统计信息写入共享统计表, 写入失败(e.g. 主进程已退出)时返回 False
+    '''
+    try:
+        stats_board[os.getpid()] = stats()
+    except Exception:
+        logger.warning(f"report worker stats failed: {traceback.format_exc()}")
+        return False
+    return True
+
+def _report_loop(stats_board):
+    while True:
+        time.sleep(STATS_INTERVAL)
+        if not report_stats(stats_board):
+            break
+
+def ping():
+    r''' 用于进程池预热及健康检查
+    '''
+    return _executor is not None
@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+# coding=utf-8
+#================================================================
+#   Copyright (C) 2022 Fisher. All rights reserved.
+#
+#   文件名称：bulk.py
+#   创建日期：2026年10月18日
+#   描    述：大规模离线抽取: 流式读取 JSONL/TSV 输入, 多进程处理, 按输入顺序
+#             增量写出结果, 并支持断点续跑
+#
+# e.g.: python bulk.py -i comments.jsonl -o results.jsonl -w 8 --text-field query
+#       python bulk.py -i comments.jsonl -o results.jsonl -w 8 --cache-size 10000 --disk-cache cache.db
+#
+#================================================================
+
+import os
+import sys
+import json
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from auszieher.utils import worker
+from auszieher.utils.logger import logger
+
+
+def read_records(path, skip=0):
+    r''' 流式读取输入, 跳过前 skip 行(断点续跑)
+    '''
+    with open(path, 'r', encoding='utf-8') as rf:
+        for lineno, line in enumerate(rf):
+            if lineno < skip:
+                continue
+            yield lineno, line.rstrip('\n')
+
+def chunked(records, chunk_size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def parse_record(line, fmt, text_field, id_field):
+    r''' 解析单行输入, 返回 (id, text)
+    '''
+    if fmt == 'jsonl':
+        record = json.loads(line)
+        return record.get(id_field) if id_field else None, record.get(text_field, '')
+
+    items = line.split('\t')
+    text_column = int(text_field)
+    _id = items[int(id_field)] if id_field else None
+    return _id, items[text_column]
+
+def process_chunk(chunk, fmt, text_field, id_field, coref, batch_size):
+    r''' worker 进程处理一个输入块, 返回序列化后的输出行
+    '''
+    units, texts, inxs = [], [], []
+    for lineno, line in chunk:
+        unit = {"line": lineno, "query": "", "results": [], "success": True, "mesg": ""}
+        try:
+            _id, text = parse_record(line, fmt, text_field, id_field)
+            if id_field:
+                unit["id"] = _id
+            unit["query"] = text.strip()
+        except Exception as e:
+            unit["success"] = False
+            unit["mesg"] = f"illegal record: {repr(e)}"
+        if unit["success"] and unit["query"]:
+            inxs.append(len(units))
+            texts.append(unit["query"])
+        units.append(unit)
+
+    if texts:
+        outputs = worker.extract_batch(texts, coref=coref, batch_size=batch_size)
+        for inx, (success, payload) in zip(inxs, outputs):
+            if success:
+                units[inx]["results"] = payload
+            else:
+                units[inx]["success"] = False
+                units[inx]["mesg"] = payload
+
+    return [json.dumps(unit, ensure_ascii=False) for unit in units]
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return {"input_lines": 0, "output_bytes": 0}
+    with open(path, 'r') as rf:
+        return json.load(rf)
+
+def save_checkpoint(path, checkpoint):
+    # 先写临时文件再替换, 避免中断时 checkpoint 文件损坏
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as wf:
+        json.dump(checkpoint, wf)
+    os.replace(tmp_path, path)
+
+def run(args, config):
+    fmt = args.format or ('tsv' if args.input.endswith('.tsv') else 'jsonl')
+    text_field = args.text_field if args.text_field is not None else \
+                    ('query' if fmt == 'jsonl' else '0')
+    ckpt_path = args.checkpoint or f"{args.output}.ckpt"
+
+    checkpoint = {"input_lines": 0, "output_bytes": 0}
+    if args.resume:
+        checkpoint = load_checkpoint(ckpt_path)
+        logger.info(f"resume from checkpoint: {checkpoint}")
+    elif os.path.exists(ckpt_path):
+        os.remove(ckpt_path)
+
+    # 输出文件缺失或短于 checkpoint 记录的长度时, 已写出的结果丢失, 不能续跑
+    if args.resume and checkpoint["output_bytes"] > 0:
+        output_bytes = os.path.getsize(args.output) if os.path.exists(args.output) else None
+        if output_bytes is None or output_bytes < checkpoint["output_bytes"]:
+            raise RuntimeError(f"output [{args.output}] size {output_bytes} is less than checkpoint "
+                               f"output_bytes {checkpoint['output_bytes']}, can not resume, "
+                               f"rerun without --resume")
+
+    # 截断上次中断时写入的未记录到 checkpoint 中的部分结果
+    mode = 'r+b' if (args.resume and os.path.exists(args.output)) else 'wb'
+    wf = open(args.output, mode)
+    wf.truncate(checkpoint["output_bytes"])
+    wf.seek(checkpoint["output_bytes"])
+
+    records = read_records(args.input, skip=checkpoint["input_lines"])
+    chunks = chunked(records, args.chunk_size)
+    task_args = (fmt, text_field, args.id_field, args.coref, args.batch_size)
+
+    start = time.time()
+    processed = 0
+    # worker 进程异常退出(OOM、段错误等)时进程池抛出 BrokenProcessPool, 不会一直等待
+    pool = ProcessPoolExecutor(max_workers=args.workers, initializer=worker.init_executor, \
+                               initargs=(config,))
+    try:
+        # 控制在途任务数量, 避免一次性读入全部输入
+        pending = deque()
+        max_pending = args.workers * 2
+        while True:
+            while len(pending) < max_pending:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                pending.append((len(chunk), pool.submit(process_chunk, chunk, *task_args)))
+            if not pending:
+                break
+
+            # 按提交顺序写出结果, 保证输出与输入顺序一致
+            size, future = pending.popleft()
+            try:
+                lines = future.result()
+            except BrokenProcessPool as e:
+                raise RuntimeError(f"worker process died while processing input lines from "
+                                   f"{checkpoint['input_lines']}, rerun with --resume to continue") from e
+            for line in lines:
+                wf.write((line+'\n').encode('utf-8'))
+            wf.flush()
+            os.fsync(wf.fileno())
+
+            processed += size
+            checkpoint["input_lines"] += size
+            checkpoint["output_bytes"] = wf.tell()
+            save_checkpoint(ckpt_path, checkpoint)
+
+            costtime = time.time()-start
+            logger.info(f"processed: {checkpoint['input_lines']} lines, "
+                        f"speed: {round(processed/(costtime+1e-5), 2)} lines/s")
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        wf.close()
+
+    logger.info(f"bulk extract done, total: {checkpoint['input_lines']} lines, "
+                f"cost: {round(time.time()-start, 3)}s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", "-i", help="input file path, jsonl or tsv", required=True)
+    parser.add_argument("--output", "-o", help="output jsonl file path", required=True)
+    parser.add_argument("--format", "-f", help="input format, [ jsonl | tsv ], default by file suffix", \
+                        default=None)
+    parser.add_argument("--text-field", help="jsonl text field name or tsv text column index", \
+                        default=None)
+    parser.add_argument("--id-field", help="jsonl id field name or tsv id column index", \
+                        default=None)
+    parser.add_argument("--workers", "-w", help="worker process number", type=int, default=4)
+    parser.add_argument("--chunk-size", help="records per worker task", type=int, default=512)
+    parser.add_argument("--batch-size", help="nlp.pipe batch size", type=int, default=256)
+    parser.add_argument("--checkpoint", help="checkpoint file path, default: <output>.ckpt", \
+                        default=None)
+    parser.add_argument("--resume", help="resume from checkpoint", action="store_true")
+    parser.add_argument("--coref", help="enable coref parse", action="store_true")
+    parser.add_argument("--corefhosts", help="coref parser grpc hosts", \
+                        default="localhost:5010")
+    parser.add_argument("--cache-size", help="in-memory clause/structure/verdict cache size per worker, "
+                        "0 means disabled", type=int, default=0)
+    parser.add_argument("--disk-cache", help="persistent clause cache sqlite path, shared by workers, "
+                        "requires --cache-size", default=None)
+
+    args = parser.parse_args()
+    if args.disk_cache and args.cache_size <= 0:
+        parser.error("--disk-cache requires in-memory clause cache, set --cache-size")
+
+    config = {
+        "neuralcoref_hosts":args.corefhosts,
+        "clause_cache_size":args.cache_size,
+        "structure_cache_size":args.cache_size,
+        "verdict_cache_size":args.cache_size,
+        "disk_cache":args.disk_cache,
+        "sentence_pattern" :
+            {
+                "interrogative":"./data/model/sentence_pattern/interrogative/xgb.model"
+            }
+        }
+
+    try:
+        run(args, config)
+    except KeyboardInterrupt:
+        logger.warning("bulk extract interrupted, rerun with --resume to continue")
+        sys.exit(1)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# coding=utf-8
+#================================================================
+#   Copyright (C) 2022 Fisher. All rights reserved.
+#
+#   文件名称：cache_tool.py
+#   创建日期：2026年10月18日
+#   描    述：持久化子句缓存维护: 统计、清理过期版本、压缩
+#
+# e.g.: python cache_tool.py -p cache.db -t evict --keep 1
+#       python cache_tool.py -p cache.db -t compact
+#
+#================================================================
+
+import os
+import time
+import sqlite3
+import argparse
+
+
+def version_stats(conn):
+    r''' 各版本条目数及最近写入时间, 按最近写入时间倒序
+    '''
+    return conn.execute("SELECT version, COUNT(*), MAX(ctime) FROM clause_cache "
+                        "GROUP BY version ORDER BY MAX(ctime) DESC").fetchall()
+
+def stats(conn, path):
+    size = sum(os.path.getsize(p) for p in [path, f"{path}-wal"] if os.path.exists(p))
+    print(f"cache file: {path}, size: {round(size/1024/1024, 2)}MB")
+    for version, count, ctime in version_stats(conn):
+        ctime = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ctime))
+        print(f"\tversion: {version}, entries: {count}, last write: {ctime}")
+
+def evict(conn, keep=None, versions=None, older_than=None):
+    r''' 清理过期数据
+    Args:
+        keep: 保留最近写入的 keep 个版本
+        versions: 删除指定版本
+        older_than: 删除写入时间早于 older_than 天的条目
+    '''
+    drop_versions = set(versions or [])
+    if keep is not None:
+        drop_versions.update(version for version, _, _ in version_stats(conn)[keep:])
+
+    deleted = 0
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        for version in drop_versions:
+            deleted += conn.execute("DELETE FROM clause_cache WHERE version=?", (version,)).rowcount
+        if older_than is not None:
+            deadline = int(time.time() - older_than*24*3600)
+            deleted += conn.execute("DELETE FROM clause_cache WHERE ctime<?", (deadline,)).rowcount
+    print(f"evicted versions: {sorted(drop_versions)}, deleted entries: {deleted}")
+
+def compact(conn):
+    r''' 合并 WAL 并回收空间, 执行期间会阻塞写入
+    '''
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("VACUUM")
+    print("compact done")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", "-p", help="disk cache sqlite file path", required=True)
+    parser.add_argument("--task", "-t", help="task name, [ stats | evict | compact ]", \
+                        default="stats")
+    parser.add_argument("--keep", help="evict: keep the latest N versions", type=int, default=None)
+    parser.add_argument("--version", help="evict: version to delete", action="append", default=None)
+    parser.add_argument("--older-than", help="evict: delete entries older than N days", \
+                        type=float, default=None)
+
+    args = parser.parse_args()
+    if not os.path.exists(args.path):
+        parser.error(f"cache file not exists: {args.path}")
+
+    # 直接连接 sqlite, 不引入 auszieher 包, 避免加载 spacy 及模型
+    conn = sqlite3.connect(args.path, timeout=30, isolation_level=None)
+    if args.task == "stats":
+        stats(conn, args.path)
+    elif args.task == "evict":
+        if args.keep is None and args.version is None and args.older_than is None:
+            parser.error("evict requires --keep, --version or --older-than")
+        evict(conn, keep=args.keep, versions=args.version, older_than=args.older_than)
+    elif args.task == "compact":
+        compact(conn)
+    else:
+        parser.error(f"illegal task: {args.task}")
+    conn.close()
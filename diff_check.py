@@ -12,6 +12,7 @@
 
 import sys
 import json
+import time
 import argparse
 from tqdm import tqdm
 from datetime import datetime
@@ -35,7 +36,7 @@ def load_bresult():
 
     return bresults
 
-def get_extractor():
+def get_extractor(**options):
     from auszieher import Executor
     from auszieher.utils.logger import logger
     logger.remove()
@@ -49,6 +50,7 @@ def get_extractor():
                 "interrogative":"./data/model/sentence_pattern/interrogative/xgb.model"
             }
         }
+    config.update(options)
     executor = Executor(config)
     return executor
 
@@ -162,9 +164,107 @@ def diff():
     with open(f'./diff/diffinfo.{suffix}', 'w') as wf:
         wf.write('\n'.join(lines))
 
+def coref_diff():
+    r''' 本地启发式指代消解与远程指代消解服务结果一致性对比
+    '''
+    executor = get_extractor()
+    test_set = load_dataset()
+    total, agree = 0, 0
+    lines = []
+    for query in tqdm(test_set, desc="processing..."):
+        local_results = executor.extract(query, coref="local")
+        remote_results= executor.extract(query, coref="remote")
+        for lresult, rresult in zip(local_results, remote_results):
+            for etype, etype_type in (("holder", "holder_type"), ("object", "object_type")):
+                if getattr(lresult, etype_type)!="PRON" or \
+                  len(getattr(lresult, etype).tokenids)!=1:
+                    continue
+                total += 1
+                ltext = getattr(lresult, etype).text
+                rtext = getattr(rresult, etype).text
+                if ltext.lower() == rtext.lower():
+                    agree += 1
+                    continue
+                lines.append(query)
+                lines.append(f"\t{etype}: LOCAL:[{ltext}]  REMOTE:[{rtext}]")
+                lines.append('************' * 4)
+
+    agree_ratio = agree / (total+1e-5)
+    print(f"coref PRON total: {total}, agree: {agree}, agree ratio: {round(agree_ratio, 3)}")
+    suffix = datetime.strftime(datetime.now(), "%m.%d_%H:%M:%S")
+    with open(f'./diff/corefdiff.{suffix}', 'w') as wf:
+        wf.write('\n'.join(lines))
+
+def prefilter_check():
+    r''' 词典预过滤校验: verify 模式下完整处理所有子句, 统计可跳过比例及会改变结果的子句
+    '''
+    executor = get_extractor(prefilter="verify", clause_cache_size=0, structure_cache_size=0)
+    test_set = load_dataset()
+    for query in tqdm(test_set, desc="processing..."):
+        executor.extract(query, coref=False)
+
+    stats = executor.prefilter_stats()
+    print(f"prefilter clauses: {stats['clauses']}, skipped: {stats['skipped']}, "
+          f"skip ratio: {stats['skip_ratio']}, violations: {stats['violations']}")
+    suffix = datetime.strftime(datetime.now(), "%m.%d_%H:%M:%S")
+    with open(f'./diff/prefilterdiff.{suffix}', 'w') as wf:
+        wf.write('\n'.join(executor.prefilter.samples))
+
+def polarity_check():
+    r''' 本地词典极性与 TextBlob 一致性对比: 记录抽取过程中每个子句的打分文本,
+    以逐子句 TextBlob 拼接分句的结果为基准, 对比每个结果的 polarity 及 assessments, 并统计耗时
+    '''
+    from auszieher.src.sent_score import SentScore
+    from auszieher.src.polarity import LexiconPolarity
+
+    executor = get_extractor(clause_cache_size=0, structure_cache_size=0)
+    sent_score = executor.sent_score
+    texts_batches = []
+    polarity_batch_score = sent_score._polarity_batch_score
+    def record(extract_results_batch):
+        texts_batches.extend([[r.clause.replace('.', ' ') for r in extract_results] \
+                                for extract_results in extract_results_batch])
+        return polarity_batch_score(extract_results_batch)
+    sent_score._polarity_batch_score = record
+
+    test_set = load_dataset()
+    for query in tqdm(test_set, desc="processing..."):
+        executor.extract(query)
+
+    lexicon = LexiconPolarity()
+    total, agree = 0, 0
+    cost = {"textblob": 0.0, "lexicon": 0.0}
+    lines = []
+    for texts in tqdm(texts_batches, desc="comparing..."):
+        start = time.time()
+        try:
+            tresult = sent_score._textblob_model_score('!!! '.join(texts), len(texts))
+        except AssertionError:
+            tresult = [None] * len(texts)
+        cost["textblob"] += time.time() - start
+        start = time.time()
+        lresult = SentScore._score_sentences([texts], lexicon)[0]
+        cost["lexicon"] += time.time() - start
+        for text, tscore, lscore in zip(texts, tresult, lresult):
+            total += 1
+            if tscore is not None and tscore[0] == lscore[0] and \
+              [tuple(_) for _ in tscore[1]] == [tuple(_) for _ in lscore[1]]:
+                agree += 1
+                continue
+            lines.append(text)
+            lines.append(f"\tTEXTBLOB: {tscore}")
+            lines.append(f"\tLEXICON:  {lscore}")
+            lines.append('************' * 4)
+
+    print(f"polarity results: {total}, agree: {agree}, agree ratio: {round(agree/(total+1e-5), 3)}, "
+          f"cost(s): textblob {round(cost['textblob'], 3)}, lexicon {round(cost['lexicon'], 3)}")
+    suffix = datetime.strftime(datetime.now(), "%m.%d_%H:%M:%S")
+    with open(f'./diff/polaritydiff.{suffix}', 'w') as wf:
+        wf.write('\n'.join(lines))
+
 if __name__=='__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument("--task", "-t", help="task name, [ diff | genbase ]", \
+    parser.add_argument("--task", "-t", help="task name, [ diff | genbase | gendata | corefdiff | prefilter | polarity ]", \
                         default="diff")
     parser.add_argument("--detail", "-d", help="get detail result, [true | false]", \
                         default="true")
@@ -179,4 +279,13 @@ if __name__=='__main__':
         generate_result(save=True, detail=detail)
     elif args.task == "gendata":
         print("start to process task: gendata ...")
-        generate_dataset()
\ No newline at end of file
+        generate_dataset()
+    elif args.task == "corefdiff":
+        print("start to process task: corefdiff ...")
+        coref_diff()
+    elif args.task == "prefilter":
+        print("start to process task: prefilter ...")
+        prefilter_check()
+    elif args.task == "polarity":
+        print("start to process task: polarity ...")
+        polarity_check()
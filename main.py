@@ -33,6 +33,9 @@ logger.add(sys.stderr, format=fmt, level="INFO")
 
 config = {
     "neuralcoref_hosts":"ai.wgine-dev.com:32429",
+    "clause_cache_size":10000,
+    "structure_cache_size":10000,
+    "verdict_cache_size":10000,
     "sentence_pattern" : 
         {
             "interrogative":"./data/model/sentence_pattern/interrogative/xgb.model"
@@ -49,6 +52,7 @@ def reload_vocab():
     reload(auszieher.src)
     reload(auszieher.src.token_parser)
     executor.token_parser = auszieher.src.token_parser.TokenParser(model_name="en_core_web_md")
+    executor.reset_cache()
 
 def reload_rule():
     del executor.pattern_matcher
@@ -64,6 +68,7 @@ def reload_rule():
                                     vocab = executor.token_parser.model.vocab
                                 )
     executor.extractor = auszieher.src.extractor.Extractor(executor.pattern_object)
+    executor.reset_cache()
 
 while True:
     query = input("query:")
@@ -78,6 +83,10 @@ while True:
             else:
                 print("illegal reload part!!!")
         continue
+    if query.strip() == 'stats':
+        print(executor.cache_stats())
+        print(executor.prefilter_stats())
+        continue
     if query.strip() == 'exit':
         sys.exit()
     start = time.time()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# coding=utf-8
+#================================================================
+#   Copyright (C) 2022 Fisher. All rights reserved.
+#
+#   文件名称：quantize_tool.py
+#   创建日期：2026年10月18日
+#   描    述：ONNX 模型 INT8 动态量化、精度校验及激活
+#             激活前在 diff/test_set 上对比 fp32 与量化模型结果, 标签及分值偏移超出阈值时拒绝激活
+#
+# e.g.: python quantize_tool.py -t quantize -m all
+#       python quantize_tool.py -t gate -m hypo
+#       python quantize_tool.py -t activate -m all --max-label-drift 0.01 --max-score-drift 0.02
+#       python quantize_tool.py -t deactivate -m sentiment
+#
+#================================================================
+
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+from auszieher.sentence_pattern_detect.src.model_variant import DEFAULT_VARIANT, variants_file, variant_path, \
+                                                            load_variants
+
+# 路径按项目根目录解析, 与执行目录无关
+ROOT = os.path.dirname(os.path.abspath(__file__))
+HYPO_DIR = os.path.join(ROOT, "data/model/hypo")
+MODELS = {
+    "hypo": os.path.join(HYPO_DIR, "en/model.onnx"),
+    "sentiment": os.path.join(ROOT, "data/model/sentiment/stanza_sstplus.onnx"),
+}
+# 与 Model/SentScore 读取的激活文件一致: data/model/variants.json
+VARIANTS_FILE = variants_file(HYPO_DIR)
+TEST_SET = os.path.join(ROOT, "diff/test_set")
+
+
+def quantize(name, variant, per_channel=False):
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    model_input = MODELS[name]
+    model_output = variant_path(model_input, variant)
+    quantize_dynamic(model_input, model_output, weight_type=QuantType.QInt8, per_channel=per_channel)
+    print(f"{name}: quantized model saved: {model_output}")
+
+def load_queries():
+    with open(TEST_SET, 'r') as rf:
+        return [line.strip() for line in rf if line.strip()]
+
+def drift(labels, _labels, scores, _scores):
+    labels, _labels = np.array(labels), np.array(_labels)
+    scores, _scores = np.array(scores, dtype=np.float64), np.array(_scores, dtype=np.float64)
+    diffs = np.abs(scores-_scores) if len(scores) else np.zeros(1)
+    return {"samples": len(labels),
+            "label_drift": round(float(np.mean(labels!=_labels)) if len(labels) else 0.0, 4),
+            "score_drift": round(float(diffs.mean()), 4),
+            "max_score_drift": round(float(diffs.max()), 4)}
+
+def record_hypo_clauses():
+    r''' 与 diff_check.py 相同的抽取流程, 记录 Executor 实际送入虚拟语句模型的子句文本
+    (经过锚点、疑问语句过滤及关键词级联之后), 不使用缓存以记录全部调用
+    '''
+    from diff_check import get_extractor
+
+    executor = get_extractor(clause_cache_size=0, structure_cache_size=0, verdict_cache_size=0)
+    hypo_model = executor.hypo_detector.hypothetical_model.hypo_model
+    clauses = []
+    _process = hypo_model._process
+    def record(text_list, lang):
+        clauses.extend(text_list)
+        return _process(text_list, lang)
+    hypo_model._process = record
+
+    for query in load_queries():
+        executor.extract(query)
+    return clauses
+
+def gate_hypo(variant):
+    r''' 虚拟语句模型: 对比 diff/test_set 抽取过程中送入模型的子句的判断标签及虚拟语句概率
+    '''
+    from auszieher.utils.logger import logger
+    from auszieher.sentence_pattern_detect.src.model import Model
+
+    clauses = record_hypo_clauses()
+    outputs = []
+    for _variant in (DEFAULT_VARIANT, variant):
+        model = Model(HYPO_DIR, logger=logger, variant=_variant)
+        assert model.lang2variant['en'] == _variant, f"hypo model variant [{_variant}] not found"
+        result = model._process(clauses, 'en')
+        outputs.append(([label for label, _ in result],
+                        [prob if label==1 else 1-prob for label, prob in result]))
+
+    return drift(outputs[0][0], outputs[1][0], outputs[0][1], outputs[1][1])
+
+def gate_sentiment(variant):
+    r''' 情感模型: 与 diff_check.py 相同的抽取流程, 对比抽取结果的情感极性及 sent_score
+    '''
+    from diff_check import get_extractor
+    from auszieher.src.sent_score import SentScore
+
+    executor = get_extractor(clause_cache_size=0, structure_cache_size=0, sentiment_model_variant=DEFAULT_VARIANT)
+    queries = load_queries()
+    outputs = []
+    for _variant in (DEFAULT_VARIANT, variant):
+        executor.sent_score = SentScore(executor.token_parser.nlp, variant=_variant, \
+                                        anchor_type_sent=executor.sent_score.anchor_type_sent)
+        assert executor.sent_score.variant == _variant, f"sentiment model variant [{_variant}] not found"
+        outputs.append([[r.sent_score for r in executor.extract(query)] for query in queries])
+
+    labels, _labels, scores, _scores = [], [], [], []
+    for results, _results in zip(*outputs):
+        if len(results) != len(_results):
+            # 结果数量不一致时按标签全部不一致计
+            labels.append(0)
+            _labels.append(1)
+            continue
+        for score, _score in zip(results, _results):
+            labels.append(np.sign(score))
+            _labels.append(np.sign(_score))
+            scores.append(score)
+            _scores.append(_score)
+
+    return drift(labels, _labels, scores, _scores)
+
+GATES = {"hypo": gate_hypo, "sentiment": gate_sentiment}
+
+def gate(name, variant, max_label_drift, max_score_drift):
+    start = time.time()
+    metrics = GATES[name](variant)
+    passed = metrics["label_drift"] <= max_label_drift and metrics["score_drift"] <= max_score_drift
+    print(f"{name}: variant [{variant}] {'PASSED' if passed else 'FAILED'}, metrics: {metrics}, "
+          f"threshold: label {max_label_drift}, score {max_score_drift}, cost: {round(time.time()-start, 1)}s")
+    return passed, metrics
+
+def save_variants(variants):
+    with open(VARIANTS_FILE, 'w') as wf:
+        json.dump(variants, wf, indent=2)
+
+def activate(name, variant, max_label_drift, max_score_drift):
+    passed, metrics = gate(name, variant, max_label_drift, max_score_drift)
+    if not passed:
+        print(f"{name}: refuse to activate variant [{variant}]")
+        return False
+
+    variants = load_variants(VARIANTS_FILE)
+    variants[name] = {"variant": variant, "metrics": metrics,
+                      "threshold": {"label_drift": max_label_drift, "score_drift": max_score_drift},
+                      "time": time.strftime("%Y-%m-%d %H:%M:%S")}
+    save_variants(variants)
+    print(f"{name}: variant [{variant}] activated")
+    return True
+
+def deactivate(name):
+    variants = load_variants(VARIANTS_FILE)
+    variants.pop(name, None)
+    save_variants(variants)
+    print(f"{name}: fallback to {DEFAULT_VARIANT}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--task", "-t", help="task name, [ quantize | gate | activate | deactivate ]", \
+                        default="gate")
+    parser.add_argument("--model", "-m", help="model name, [ hypo | sentiment | all ]", default="all")
+    parser.add_argument("--variant", help="quantized model variant name", default="int8")
+    parser.add_argument("--per-channel", help="quantize: per channel weight quantization", action="store_true")
+    parser.add_argument("--max-label-drift", help="max label change ratio", type=float, default=0.01)
+    parser.add_argument("--max-score-drift", help="max mean absolute score change", type=float, default=0.02)
+
+    args = parser.parse_args()
+    # 校验使用 Executor, 其词典及模型按项目根目录的相对路径加载
+    os.chdir(ROOT)
+    if args.model not in list(MODELS)+["all"]:
+        parser.error(f"illegal model: {args.model}")
+    names = list(MODELS) if args.model == "all" else [args.model]
+
+    ok = True
+    for name in names:
+        if args.task == "quantize":
+            quantize(name, args.variant, per_channel=args.per_channel)
+        elif args.task == "gate":
+            ok &= gate(name, args.variant, args.max_label_drift, args.max_score_drift)[0]
+        elif args.task == "activate":
+            ok &= activate(name, args.variant, args.max_label_drift, args.max_score_drift)
+        elif args.task == "deactivate":
+            deactivate(name)
+        else:
+            parser.error(f"illegal task: {args.task}")
+    sys.exit(0 if ok else 1)
@@ -12,22 +12,40 @@
 
 import time
 import json
+import asyncio
 import argparse
 import traceback
+from multiprocessing import Manager
+from concurrent.futures import ProcessPoolExecutor
 from sanic import Sanic
 from sanic import response
 
+from auszieher.utils import worker
+from auszieher.utils.batcher import MicroBatcher
 from auszieher.utils.logger import logger
-from auszieher import Executor
 
 parser = argparse.ArgumentParser()
 parser.add_argument("--corefhosts", help="coref parser grpc hosts", \
                     default="localhost:5010")
+parser.add_argument("--workers", help="extract worker process number", \
+                    type=int, default=2)
+parser.add_argument("--batch-window-ms", help="micro batching max wait window(ms), 0 means disabled", \
+                    type=float, default=0)
+parser.add_argument("--batch-max-clauses", help="micro batching max clauses per batch", \
+                    type=int, default=64)
+parser.add_argument("--parse-mode", help="spacy parse mode, [ clause | document ], "
+                    "document mode only applies to unbatched requests", default="clause")
+parser.add_argument("--cache-size", help="in-memory clause/structure/verdict cache size per worker, "
+                    "0 means disabled", type=int, default=0)
 
 args = parser.parse_args()
 
 config = {
     "neuralcoref_hosts":args.corefhosts,
+    "parse_mode":args.parse_mode,
+    "clause_cache_size":args.cache_size,
+    "structure_cache_size":args.cache_size,
+    "verdict_cache_size":args.cache_size,
     "sentence_pattern" : 
         {
             "interrogative":"./data/model/sentence_pattern/interrogative/xgb.model"
@@ -35,10 +53,56 @@ config = {
     }
 
 app = Sanic('auszieher')
-executor = Executor(config=config)
+# 抽取为CPU密集型任务, 交由进程池处理, 事件循环只负责IO
+pool = None
+batcher = None
+# 各 worker 进程按 pid 上报的统计信息
+manager = None
+stats_board = None
+
+async def extract_batch(texts):
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(pool, worker.extract_batch, texts, True)
+
+@app.listener('before_server_start')
+async def init_pool(app, loop):
+    global pool, batcher, manager, stats_board
+    manager = Manager()
+    stats_board = manager.dict()
+    pool = ProcessPoolExecutor(max_workers=args.workers, \
+                               initializer=worker.init_executor, initargs=(config, stats_board))
+    # 预热: 等待所有worker完成 Executor 初始化后再接收请求
+    await asyncio.gather(*[loop.run_in_executor(pool, worker.ping) for _ in range(args.workers)])
+    logger.info(f"extract worker pool ready, workers: {args.workers}")
+
+    if args.batch_window_ms > 0:
+        batcher = MicroBatcher(extract_batch, max_wait_ms=args.batch_window_ms, \
+                               max_clauses=args.batch_max_clauses, workers=args.workers)
+        logger.info(f"micro batching enabled, window: {args.batch_window_ms}ms, "
+                    f"max clauses: {args.batch_max_clauses}")
+        if args.parse_mode == "document":
+            logger.warning("parse_mode [document] is ignored by micro batching, batched requests "
+                           "use clause parse mode")
+
+@app.listener('after_server_stop')
+async def close_pool(app, loop):
+    pool.shutdown(wait=False)
+    manager.shutdown()
+
+@app.route('/health', methods=['GET'])
+async def health(request):
+    return response.json({"success":True})
+
+@app.route('/stats', methods=['GET'])
+async def stats(request):
+    # 各 worker 进程独立持有缓存, 统计信息由 worker 按 pid 写入共享统计表,
+    # 至多延迟 worker.STATS_INTERVAL 秒, updated_at 为写入时间
+    board = stats_board.copy()
+    worker_stats = [board[pid] for pid in sorted(board)]
+    return response.json({"success":True, "workers":worker_stats})
 
 @app.route('/extract', methods=['POST'])
-def extract(request):
+async def extract(request):
     resp = {"results":[], 
             "mesg":'', 
             "success":True,
@@ -52,11 +116,18 @@ def extract(request):
         costtime = round((time.time()-start)*1000, 3)
         resp['costtime'] = f"{costtime}ms"
         return response.json(resp)
+    loop = asyncio.get_event_loop()
     try:
-        results = executor.extract(query, coref=True)
+        if batcher is not None:
+            success, results = await batcher.submit(query)
+        else:
+            success, results = await loop.run_in_executor(pool, worker.extract, query, True)
     except Exception as e:
-        mesg = traceback.format_exc()
-        logger.error(f"extract failed: {mesg}")
+        # worker 进程异常退出等情况
+        success, results = False, traceback.format_exc()
+        logger.error(f"extract worker failed: {results}")
+    if not success:
+        mesg = results
         resp["success"] = False
         resp["mesg"] = mesg
         costtime = round((time.time()-start)*1000, 3)
@@ -66,7 +137,7 @@ def extract(request):
     # -debug info
     for result in results:
         logger.debug(f"{result}")
-        resp["results"].append(result.to_dict())
+        resp["results"].append(result)
 
     costtime = round((time.time()-start)*1000, 3)
     resp["costtime"] = f"{costtime}ms"
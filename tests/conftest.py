@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+# coding=utf-8
+#================================================================
+#
+#   文件名称：conftest.py
+#   描    述：测试只加载被测子模块: 不执行 auszieher/__init__.py(加载 spacy 模型、
+#             句型/情感模型及指代消解 SDK)、auszieher/utils/__init__.py(文本规范化依赖)
+#             及 sentence_pattern_detect/src/__init__.py(句型模型依赖),
+#             数据文件按项目根目录的相对路径加载
+#
+#================================================================
+
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+for name in ("auszieher", "auszieher.utils", "auszieher.sentence_pattern_detect.src"):
+    package = types.ModuleType(name)
+    package.__path__ = [os.path.join(ROOT, *name.split("."))]
+    sys.modules.setdefault(name, package)
+
+# 指代消解 SDK 为内部依赖, 测试使用 fake client 替换
+try:
+    import coref_parserSDK
+except ImportError:
+    sdk = types.ModuleType("coref_parserSDK")
+    sdk.CorefParseClient = None
+    sys.modules["coref_parserSDK"] = sdk
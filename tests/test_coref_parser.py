@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# coding=utf-8
+#================================================================
+#
+#   文件名称：test_coref_parser.py
+#   描    述：CorefParser 对冲请求、熔断及批量接口测试, 使用本地 fake CorefParseClient;
+#             请求的完成顺序由 Event 控制, 熔断恢复使用 fake clock, 断言不依赖耗时
+#
+#================================================================
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from auszieher.src import coref_parser
+from auszieher.src.coref_parser import CorefParser, CircuitBreaker
+
+WAIT = 5
+
+
+def reply(corefmap, success=True):
+    return SimpleNamespace(success=success, result=SimpleNamespace(corefmap=corefmap))
+
+class Attempt(object):
+    r''' 一次调用的行为: release 之前阻塞, 之后返回 ret(Exception 则抛出)
+    '''
+    def __init__(self, ret, blocked=False):
+        self.ret = ret
+        self.released = threading.Event()
+        self.started = threading.Event()
+        if not blocked:
+            self.released.set()
+
+    def __call__(self):
+        self.started.set()
+        assert self.released.wait(WAIT)
+        if isinstance(self.ret, Exception):
+            raise self.ret
+        return self.ret if isinstance(self.ret, SimpleNamespace) else reply(self.ret)
+
+class FakeClient(object):
+    r''' 按调用顺序依次执行 attempts, 用完后返回空结果
+    '''
+    attempts, calls, lock = [], [], threading.Lock()
+
+    def __init__(self, host):
+        self.host = host
+
+    def parse(self, text, timeout=3):
+        with self.lock:
+            self.calls.append((self.host, text))
+            attempt = self.attempts.pop(0) if self.attempts else Attempt({})
+        return attempt()
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def make_parser(monkeypatch):
+    attempts, parsers = [], []
+    def make(_attempts, **kwargs):
+        monkeypatch.setattr(coref_parser, "CorefParseClient", FakeClient)
+        attempts.extend(_attempts)
+        FakeClient.attempts = list(_attempts)
+        FakeClient.calls = []
+        kwargs.setdefault("timeout", WAIT)
+        parser = CorefParser("host-a,host-b", **kwargs)
+        parsers.append(parser)
+        return parser
+    yield make
+
+    # 释放仍在阻塞的调用
+    for attempt in attempts:
+        attempt.released.set()
+    for parser in parsers:
+        parser.pool.shutdown(wait=True)
+        parser.call_pool.shutdown(wait=True)
+
+
+def test_hedge_fires_after_hedge_delay(make_parser):
+    slow = Attempt({"slow": 1}, blocked=True)
+    parser = make_parser([slow, Attempt({"fast": 1})], hedge_delay=0.01)
+    assert parser("text") == {"fast": 1}
+    # 对冲请求发往另一个 channel
+    assert [host for host, _ in FakeClient.calls] == ["host-a", "host-b"]
+
+def test_no_hedge_before_hedge_delay(make_parser):
+    parser = make_parser([Attempt({"first": 1})], hedge_delay=WAIT)
+    assert parser("text") == {"first": 1}
+    assert len(FakeClient.calls) == 1
+
+def test_first_success_wins(make_parser):
+    # 对冲请求先返回
+    first, second = Attempt({"first": 1}, blocked=True), Attempt({"second": 1}, blocked=True)
+    parser = make_parser([first, second], hedge_delay=0.01)
+    future = parser.submit("text")
+    assert second.started.wait(WAIT)
+    second.released.set()
+    assert future.result(WAIT) == {"second": 1}
+
+    # 对冲已发出, 原请求先返回
+    first, second = Attempt({"first": 1}, blocked=True), Attempt({"second": 1}, blocked=True)
+    parser = make_parser([first, second], hedge_delay=0.01)
+    future = parser.submit("text")
+    assert second.started.wait(WAIT)
+    first.released.set()
+    assert future.result(WAIT) == {"first": 1}
+
+def test_failed_attempt_hedges_immediately(make_parser):
+    parser = make_parser([Attempt(RuntimeError("unavailable")), Attempt({"second": 1})], hedge_delay=WAIT)
+    assert parser("text") == {"second": 1}
+    assert parser.breaker.state == CircuitBreaker.CLOSED
+
+def test_unsuccessful_reply_is_empty_result(make_parser):
+    parser = make_parser([Attempt(reply({}, success=False))], hedge_delay=WAIT, failure_threshold=1)
+    assert parser("text") == {}
+    # 无结果不是故障: 不对冲, 不熔断
+    assert len(FakeClient.calls) == 1
+    assert parser.breaker.state == CircuitBreaker.CLOSED
+
+def test_breaker_opens_after_failure_threshold(make_parser):
+    failures = [Attempt(RuntimeError("unavailable")) for _ in range(6)]
+    parser = make_parser(failures, failure_threshold=3, max_attempts=2)
+    for _ in range(2):
+        assert parser("text") == {}
+        assert parser.breaker.state == CircuitBreaker.CLOSED
+    assert parser("text") == {}
+    assert parser.breaker.state == CircuitBreaker.OPEN
+
+    # 熔断期间不再发起请求
+    calls = len(FakeClient.calls)
+    assert parser("text") == {}
+    assert len(FakeClient.calls) == calls
+
+def test_breaker_half_opens_after_recovery_timeout(make_parser, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(coref_parser, "time", clock)
+    failures = [Attempt(RuntimeError("unavailable")) for _ in range(2)]
+    parser = make_parser(failures + [Attempt({"ok": 1})], failure_threshold=1, recovery_timeout=30)
+    assert parser("text") == {}
+    assert parser.breaker.state == CircuitBreaker.OPEN
+
+    clock.now += 29
+    assert not parser.breaker.allow()
+    clock.now += 1
+    assert parser("text") == {"ok": 1}
+    assert parser.breaker.state == CircuitBreaker.CLOSED
+
+def test_half_open_probe_failure_reopens(make_parser, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(coref_parser, "time", clock)
+    failures = [Attempt(RuntimeError("unavailable")) for _ in range(4)]
+    parser = make_parser(failures, failure_threshold=1, recovery_timeout=30)
+    parser("text")
+    clock.now += 30
+    assert parser("text") == {}
+    assert parser.breaker.state == CircuitBreaker.OPEN
+    assert parser.breaker.opened_at == clock.now
+
+def test_batch_keeps_text_order(make_parser, monkeypatch):
+    # 按文本分配行为, 先提交的文本后返回
+    first = Attempt({"a": 1}, blocked=True)
+    by_text = {"a": first, "b": Attempt({"b": 2})}
+    parser = make_parser([first], hedge_delay=WAIT, max_workers=2)
+    monkeypatch.setattr(FakeClient, "parse", lambda self, text, timeout=3: by_text[text]())
+
+    results = []
+    batch = threading.Thread(target=lambda: results.extend(parser.batch(["a", "b"])))
+    batch.start()
+    assert first.started.wait(WAIT)
+    first.released.set()
+    batch.join(WAIT)
+    assert results == [{"a": 1}, {"b": 2}]
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# coding=utf-8
+#================================================================
+#
+#   文件名称：test_coref_resolver.py
+#   描    述：本地启发式指代消解测试, 使用人工标注的 spacy Doc, 不依赖解析模型
+#
+#================================================================
+
+import spacy
+from spacy.tokens import Doc
+
+from auszieher.src.coref_resolver import HeuristicCorefResolver
+
+# "  I love the phone. It breaks."
+WORDS  = ["  ", "I", "love", "the", "phone", ".", "It", "breaks", "."]
+SPACES = [False, True, True, True, False, True, True, False, False]
+POS    = ["SPACE", "PRON", "VERB", "DET", "NOUN", "PUNCT", "PRON", "VERB", "PUNCT"]
+TAGS   = ["_SP", "PRP", "VBP", "DT", "NN", ".", "PRP", "VBZ", "."]
+DEPS   = ["dep", "nsubj", "ROOT", "det", "dobj", "punct", "nsubj", "ROOT", "punct"]
+HEADS  = [2, 2, 2, 4, 2, 2, 7, 7, 7]
+LEMMAS = ["  ", "I", "love", "the", "phone", ".", "it", "break", "."]
+
+
+def parse_document():
+    r''' 与 Executor._parse_document 相同的子句切分: 子句从各自起始 token 开始, 文档开头的空白不属于任何子句
+    '''
+    nlp = spacy.blank("en")
+    doc = Doc(nlp.vocab, words=WORDS, spaces=SPACES, pos=POS, tags=TAGS, deps=DEPS, \
+              heads=HEADS, lemmas=LEMMAS)
+    bounds = [1, 6, len(doc)]
+    spans = [doc[start:end] for start, end in zip(bounds, bounds[1:])]
+    return doc, [span.as_doc() for span in spans], [span.start for span in spans]
+
+def test_leading_whitespace_document():
+    doc, docs, offsets = parse_document()
+    assert doc.text.startswith("  I love")
+    token_id = [token.i for token in doc if token.text == "It"][0]
+
+    corefmap = HeuristicCorefResolver()(docs, [token_id], offsets)
+    assert corefmap[token_id].coref_main == "the phone"
+
+def test_clause_offsets_accumulate_without_offsets():
+    _, docs, _ = parse_document()
+    # 按子句解析时子句 token 连续, 全局 id 按子句长度累加
+    token_id = len(docs[0]) + [token.i for token in docs[1] if token.text == "It"][0]
+
+    corefmap = HeuristicCorefResolver()(docs, [token_id])
+    assert corefmap[token_id].coref_main == "the phone"